@@ -0,0 +1,81 @@
+"""
+Arabic text normalization and light stemming, shared by the converters, the loader
+and the search indexes so that spelling variants match.
+
+    normalize_arabic("أَحْمَــد")  -> "احمد"
+    normalize_arabic("المكتبة", stem=True)  -> "مكتب"
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+# Diacritics (tashkeel), superscript alef, Quranic marks and tatweel are removed with one
+# precompiled regex; letter variants are folded with str.replace, which is several times
+# faster than a per-character str.translate on Arabic text.
+_STRIP = re.compile('[\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')
+_FOLDS = (('أ', 'ا'), ('إ', 'ا'), ('آ', 'ا'), ('ٱ', 'ا'), ('ى', 'ي'), ('ة', 'ه'))
+_DIGITS = re.compile('[\u0660-\u0669\u06F0-\u06F9]')
+_DIGIT_TRANSLATION = str.maketrans(
+    {**{chr(0x0660 + d): str(d) for d in range(10)}, **{chr(0x06F0 + d): str(d) for d in range(10)}}
+)
+
+# Light stemming affixes (after folding, so taa marbuta is already 'ه'), longest first
+_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال', 'و')
+_SUFFIXES = ('ها', 'ان', 'ات', 'ون', 'ين', 'يه', 'ه', 'ي')
+_MIN_STEM = 2
+
+
+@lru_cache(maxsize=1 << 16)
+def light_stem(token: str) -> str:
+    """Strip one common prefix and the common suffixes from a normalized token, keeping >= 2 letters."""
+    for prefix in _PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= _MIN_STEM:
+            token = token[len(prefix):]
+            break
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            token = token[:-len(suffix)]
+    return token
+
+
+@lru_cache(maxsize=1 << 18)
+def normalize_arabic(text: str, stem: bool = False) -> str:
+    """
+    Normalize Arabic text for matching: strip tashkeel and tatweel, fold alef/yaa/taa
+    variants, lowercase Latin letters and collapse whitespace. Results are cached, so the
+    repeated fillers and intros common in captions are only processed once.
+
+    Args:
+        text (str): Raw text.
+        stem (bool): Also light-stem each word (strip common prefixes/suffixes). Default is False.
+
+    Returns:
+        str: The normalized text.
+    """
+    return _normalize(text, stem)
+
+
+def _normalize(text: str, stem: bool = False) -> str:
+    normalized = _STRIP.sub('', text)
+    for variant, base in _FOLDS:
+        if variant in normalized:
+            normalized = normalized.replace(variant, base)
+    if _DIGITS.search(normalized):
+        normalized = normalized.translate(_DIGIT_TRANSLATION)
+    normalized = ' '.join(normalized.lower().split())
+    if stem:
+        normalized = ' '.join(map(light_stem, normalized.split(' ')))
+    return normalized
+
+
+def normalize_many(texts: Iterable[str], stem: bool = False) -> List[str]:
+    """Normalize a batch of texts, processing each distinct text once (bypasses the LRU cache)."""
+    seen: Dict[str, str] = {}
+    result = []
+    for text in texts:
+        normalized = seen.get(text)
+        if normalized is None:
+            normalized = seen[text] = _normalize(text, stem)
+        result.append(normalized)
+    return result
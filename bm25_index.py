@@ -0,0 +1,328 @@
+"""
+Segment-level BM25 keyword index, built at load time and used by
+JSONToQdrantLoader.hybrid_search alongside the vector query.
+"""
+
+import json
+import math
+import os
+import shutil
+from array import array
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from text_index import tokenize
+
+
+class BM25IndexBuilder:
+    """
+    Collects term frequencies and segment lengths, then writes precomputed BM25 weights.
+
+    Every posting stores its final BM25 contribution (idf * saturated tf with length
+    normalization), so a query only gathers and sums the postings of its terms.
+
+    Files written to the index directory:
+        meta.json     - segment count, parameters and the video table
+        vocab.json    - term -> [offset, doc_freq] into rows.u32 / tfs.u32 / weights.f32
+        rows.u32      - segment rows per term, ascending
+        tfs.u32       - raw term frequency of each posting (for merging later loads)
+        weights.f32   - BM25 weight of each posting
+        segments.i4   - (video row, ts_idx) per segment row
+        lengths.u32   - token count per segment row (for merging later loads)
+
+    Usage:
+    builder = BM25IndexBuilder()
+    for video in videos:
+        builder.add_video(video)
+    builder.write('bm25_index/youtube_videos')
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, stem: bool = False):
+        """
+        Args:
+            k1 (float): Term frequency saturation. Default is 1.2.
+            b (float): Length normalization strength. Default is 0.75.
+            stem (bool): Light-stem tokens (queries are stemmed the same way). Default is False.
+        """
+        self.k1 = k1
+        self.b = b
+        self.stem = stem
+        self.videos: List[Dict[str, Any]] = []
+        self.segments = array('i')  # Interleaved (video row, ts_idx)
+        self.lengths = array('I')
+        self._rows: Dict[str, array] = {}
+        self._tfs: Dict[str, array] = {}
+
+    @property
+    def term_count(self) -> int:
+        """Distinct terms added so far."""
+        return len(self._rows)
+
+    def add_video(self, video: Dict[str, Any]) -> None:
+        """Add every timestamp text of one video dict as its own BM25 document."""
+        video_row = len(self.videos)
+        self.videos.append({
+            'video_id': video.get('video_id', ''),
+            'youtuber_id': video.get('youtuber_id', ''),
+            'publish_date': video.get('publish_date') or ''
+        })
+        term_rows, term_tfs = self._rows, self._tfs
+        for ts_idx, ts in enumerate(video.get('timestamps', [])):
+            row = len(self.lengths)
+            tokens = tokenize(ts.get('text', ''), self.stem)
+            self.segments.extend((video_row, ts_idx))
+            self.lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                rows = term_rows.get(term)
+                if rows is None:
+                    rows = term_rows[term] = array('I')
+                    term_tfs[term] = array('I')
+                rows.append(row)
+                term_tfs[term].append(tf)
+
+    def write(self, index_dir: str, merge: bool = False, drop_video_ids: Iterable[str] = ()) -> int:
+        """
+        Compute the BM25 weights and write the index files to index_dir.
+
+        With merge, the segments of an index already in index_dir are kept (except videos added
+        again here or listed in drop_video_ids) and re-weighted together with the new ones, so
+        several loads into one collection share one index. Old postings are streamed term by
+        term from the memory-mapped files; only their per-segment columns are read whole.
+
+        Returns:
+            int: Segments in the written index.
+
+        Raises:
+            ValueError: If the existing index can't be merged (other parameters, or written
+                without raw term frequencies).
+        """
+        index_dir = index_dir.rstrip('/\\')
+        base = None
+        if merge and os.path.exists(os.path.join(index_dir, 'meta.json')):
+            base = _MergeBase(index_dir, self, {video['video_id'] for video in self.videos} | set(drop_video_ids))
+        tmp_dir = index_dir + '.tmp'
+        if os.path.isdir(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+
+        # Kept segments of the old index first, then this builder's (video rows shifted past the kept videos)
+        segment_lengths = np.frombuffer(self.lengths, dtype=np.uint32)
+        segments = np.frombuffer(self.segments, dtype=np.int32).copy()
+        videos = self.videos
+        base_count = 0
+        if base is not None:
+            segments[0::2] += len(base.videos)
+            segment_lengths = np.concatenate([base.lengths, segment_lengths])
+            segments = np.concatenate([base.segments, segments])
+            videos = base.videos + self.videos
+            base_count = base.count
+        count = len(segment_lengths)
+        lengths = segment_lengths.astype(np.float32)
+        avgdl = float(lengths.mean()) if count else 0.0
+        # Per-row length normalization, shared by every term
+        norm = self.k1 * (1 - self.b + self.b * lengths / (avgdl or 1.0))
+
+        vocab = {}
+        offset = 0
+        terms = sorted(self._rows.keys() | (base.vocab.keys() if base is not None else set()))
+        with open(os.path.join(tmp_dir, 'rows.u32'), 'wb') as rows_file, \
+                open(os.path.join(tmp_dir, 'tfs.u32'), 'wb') as tfs_file, \
+                open(os.path.join(tmp_dir, 'weights.f32'), 'wb') as weights_file:
+            for term in terms:
+                rows = np.frombuffer(self._rows.get(term, array('I')), dtype=np.uint32) + np.uint32(base_count)
+                tfs = np.frombuffer(self._tfs.get(term, array('I')), dtype=np.uint32)
+                if base is not None and term in base.vocab:
+                    old_rows, old_tfs = base.postings(term)
+                    rows, tfs = np.concatenate([old_rows, rows]), np.concatenate([old_tfs, tfs])
+                if not len(rows):
+                    continue  # Only in dropped videos
+                idf = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+                tf = tfs.astype(np.float32)
+                weights = idf * tf * (self.k1 + 1) / (tf + norm[rows])
+                rows_file.write(rows.astype(np.uint32).tobytes())
+                tfs_file.write(tfs.astype(np.uint32).tobytes())
+                weights_file.write(weights.astype(np.float32).tobytes())
+                vocab[term] = [offset, len(rows)]
+                offset += len(rows)
+
+        segment_lengths.astype(np.uint32).tofile(os.path.join(tmp_dir, 'lengths.u32'))
+        segments.astype(np.int32).tofile(os.path.join(tmp_dir, 'segments.i4'))
+        with open(os.path.join(tmp_dir, 'vocab.json'), 'w', encoding='utf-8') as f:
+            json.dump(vocab, f, ensure_ascii=False, separators=(',', ':'))
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'count': count, 'avgdl': avgdl, 'k1': self.k1, 'b': self.b, 'stem': self.stem,
+                'videos': videos
+            }, f, ensure_ascii=False)
+        del base  # Release the old memmaps before replacing their files
+        if os.path.isdir(index_dir):
+            shutil.rmtree(index_dir)
+        os.replace(tmp_dir, index_dir)
+        return count
+
+
+class _MergeBase:
+    """The part of an existing index that BM25IndexBuilder.write(merge=True) keeps, with rows renumbered."""
+
+    def __init__(self, index_dir: str, builder: BM25IndexBuilder, dropped: set):
+        with open(os.path.join(index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if (meta['k1'], meta['b'], meta.get('stem', False)) != (builder.k1, builder.b, builder.stem):
+            raise ValueError(f"The BM25 index in {index_dir} was built with other parameters; rebuild it instead of merging.")
+        if not os.path.exists(os.path.join(index_dir, 'tfs.u32')):
+            raise ValueError(f"The BM25 index in {index_dir} has no raw term frequencies to merge with; rebuild it.")
+        with open(os.path.join(index_dir, 'vocab.json'), 'r', encoding='utf-8') as f:
+            self.vocab: Dict[str, List[int]] = json.load(f)
+        old_count = meta['count']
+        postings = sum(doc_freq for _, doc_freq in self.vocab.values())
+        self._rows = BM25Index._memmap(os.path.join(index_dir, 'rows.u32'), np.uint32, postings)
+        self._tfs = BM25Index._memmap(os.path.join(index_dir, 'tfs.u32'), np.uint32, postings)
+        keep_video = np.array([video['video_id'] not in dropped for video in meta['videos']], dtype=bool)
+        self.videos = [video for video, keep in zip(meta['videos'], keep_video) if keep]
+        segments = np.fromfile(os.path.join(index_dir, 'segments.i4'), dtype=np.int32, count=2 * old_count)
+        self._keep = keep_video[segments[0::2]] if old_count else np.zeros(0, dtype=bool)
+        self._new_row = np.cumsum(self._keep, dtype=np.int64) - 1  # Old row -> row in the merged index
+        video_rows = np.cumsum(keep_video, dtype=np.int64) - 1
+        kept = segments.reshape(-1, 2)[self._keep]
+        kept[:, 0] = video_rows[kept[:, 0]]
+        self.segments = kept.reshape(-1)
+        self.lengths = np.fromfile(os.path.join(index_dir, 'lengths.u32'), dtype=np.uint32, count=old_count)[self._keep]
+        self.count = len(self.lengths)
+
+    def postings(self, term: str):
+        """Kept (rows, tfs) of a term, rows renumbered."""
+        offset, doc_freq = self.vocab[term]
+        rows = self._rows[offset:offset + doc_freq]
+        keep = self._keep[rows]
+        return self._new_row[rows[keep]].astype(np.uint32), np.asarray(self._tfs[offset:offset + doc_freq][keep])
+
+
+class BM25Index:
+    """
+    Read side of an index written by BM25IndexBuilder.
+
+    Postings are memory-mapped; a query sums the precomputed weights of its terms per
+    segment and takes the top hits with argpartition, so its cost is proportional to the
+    postings of the query terms only.
+
+    Usage:
+    index = BM25Index('bm25_index/youtube_videos')
+    index.search('ابن رشد', limit=10, youtuber_id='1')
+    """
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(index_dir, 'vocab.json'), 'r', encoding='utf-8') as f:
+            self.vocab: Dict[str, List[int]] = json.load(f)
+        self.count = meta['count']
+        self.stem = meta.get('stem', False)
+        self.videos: List[Dict[str, Any]] = meta['videos']
+        postings = sum(doc_freq for _, doc_freq in self.vocab.values())
+        self._rows = self._memmap(os.path.join(index_dir, 'rows.u32'), np.uint32, postings)
+        self._weights = self._memmap(os.path.join(index_dir, 'weights.f32'), np.float32, postings)
+        segments = self._memmap(os.path.join(index_dir, 'segments.i4'), np.int32, 2 * self.count)
+        self._segment_video = segments[0::2]
+        self._segment_ts_idx = segments[1::2]
+        # Video columns for vectorized filters
+        self._youtuber_ids = np.array([video['youtuber_id'] for video in self.videos], dtype=str)
+        self._video_ids = np.array([video['video_id'] for video in self.videos], dtype=str)
+        self._publish_dates = np.array([video['publish_date'] for video in self.videos], dtype=str)
+
+    @staticmethod
+    def _memmap(file_path: str, dtype, length: int):
+        if not length:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode='r', shape=(length,))
+
+    def video_mask(
+        self,
+        youtuber_id: Optional[str] = None,
+        video_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        """Boolean mask over video rows matching the filters, or None if no filter is set."""
+        if not (youtuber_id or video_id or date_from or date_to):
+            return None
+        mask = np.ones(len(self.videos), dtype=bool)
+        if youtuber_id:
+            mask &= self._youtuber_ids == youtuber_id
+        if video_id:
+            mask &= self._video_ids == video_id
+        if date_from or date_to:
+            mask &= self._publish_dates != ''  # Videos without a date never match a date filter
+        if date_from:
+            mask &= self._publish_dates.astype(f'U{len(date_from)}') >= date_from
+        if date_to:
+            mask &= self._publish_dates.astype(f'U{len(date_to)}') <= date_to
+        return mask
+
+    def search(self, query: str, limit: int = 10, **filters) -> List[Dict[str, Any]]:
+        """
+        Top-`limit` segments by BM25 score.
+
+        Args:
+            query (str): Query text; tokenized like the indexed segments.
+            limit (int): Number of hits. Default is 10.
+            **filters: youtuber_id, video_id, date_from, date_to (see video_mask).
+
+        Returns:
+            List[Dict[str, Any]]: Hits as {'video_id', 'youtuber_id', 'ts_idx', 'score'}, best first.
+        """
+        spans = [self.vocab[term] for term in dict.fromkeys(tokenize(query, self.stem)) if term in self.vocab]
+        if not spans:
+            return []
+        rows = np.concatenate([self._rows[offset:offset + doc_freq] for offset, doc_freq in spans])
+        weights = np.concatenate([self._weights[offset:offset + doc_freq] for offset, doc_freq in spans])
+
+        mask = self.video_mask(**filters)
+        if mask is not None:
+            keep = mask[self._segment_video[rows]]
+            rows, weights = rows[keep], weights[keep]
+        if len(spans) > 1 and len(rows):
+            # Sum the weights of segments matching several terms
+            if len(rows) * 8 > self.count:
+                scores = np.bincount(rows, weights=weights, minlength=self.count)
+                rows = np.flatnonzero(scores)
+                weights = scores[rows]
+            else:
+                rows, inverse = np.unique(rows, return_inverse=True)
+                weights = np.bincount(inverse, weights=weights)
+
+        if len(rows) > limit:
+            best = np.argpartition(-weights, limit)[:limit]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-weights[best], kind='stable')]
+        hits = []
+        for i in best:
+            row = int(rows[i])
+            video = self.videos[int(self._segment_video[row])]
+            hits.append({
+                'video_id': video['video_id'],
+                'youtuber_id': video['youtuber_id'],
+                'ts_idx': int(self._segment_ts_idx[row]),
+                'score': float(weights[i])
+            })
+        return hits
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> List[Hashable]:
+    """
+    Merge ranked lists of keys with reciprocal rank fusion: score(key) = sum of 1 / (k + rank).
+
+    Args:
+        rankings: Ranked key lists (best first), e.g. one from BM25 and one from vectors.
+        k (int): Rank damping constant; 60 is the usual choice. Default is 60.
+
+    Returns:
+        List[Hashable]: All keys, best fused score first (ties keep first-seen order).
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.__getitem__, reverse=True)
@@ -4,10 +4,19 @@ Convert CSV files to JSON format for the YouTube Arabic Search app
 """
 
 import csv
+import gzip
+import heapq
 import json
+import os
 import sys
+import tempfile
+from functools import lru_cache
 from pathlib import Path
 
+from arabic_normalize import normalize_arabic
+from corpus import is_corpus, write_corpus
+from json_stream import is_jsonl
+
 def convert_youtubers_csv_to_json(csv_file, output_file):
     """Convert YouTubers CSV to JSON format"""
     youtubers = []
@@ -34,6 +43,7 @@ def convert_youtubers_csv_to_json(csv_file, output_file):
     print(f"✅ Converted {len(youtubers)} YouTubers to {output_file}")
     return youtubers
 
+@lru_cache(maxsize=1 << 16)  # Caption exports repeat the same timestamp strings constantly
 def parse_time_to_seconds(time_str):
     """Convert time string (HH:MM:SS or MM:SS) to total seconds"""
     if not time_str or not isinstance(time_str, str):
@@ -53,64 +63,194 @@ def parse_time_to_seconds(time_str):
     except:
         return 0
 
-def convert_transcripts_csv_to_json(csv_file, output_file, youtuber_id_map):
-    """Convert Transcripts CSV to JSON format with support for multiple rows per video"""
-    video_map = {} # Using a map to group multiple rows by video_id
-    
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            video_id = row.get('video_id', '')
+class _VideosNotGrouped(Exception):
+    """A video_id reappeared after its rows ended (input is not grouped by video)."""
+
+def _transcript_row(row):
+    """(video_id, timestamp or None) for one CSV row - checks multiple common column names"""
+    video_id = row.get('video_id', '')
+    text = row.get('text', row.get('transcript', row.get('content', '')))
+    if not text:
+        return video_id, None
+    start_time_str = row.get('start_time', row.get('start', row.get('timestamp', row.get('time', '0'))))
+    end_time_str = row.get('end_time', row.get('end', '0'))
+    # Normalized text is stored next to the raw text for search
+    return video_id, {
+        "start_time": parse_time_to_seconds(start_time_str),
+        "end_time": parse_time_to_seconds(end_time_str),
+        "text": text,
+        "text_normalized": normalize_arabic(text)
+    }
+
+def _video_header(row, video_id):
+    """Video-level fields, taken from the first row of each video"""
+    return {
+        "youtuber_id": row.get('youtuber_id', ''),
+        "video_title": row.get('video_title', ''),
+        "video_id": video_id,
+        "video_url": row.get('video_url', f"https://youtube.com/watch?v={video_id}"),
+        "publish_date": row.get('publish_date', ''),
+        "duration": row.get('duration', ''),
+        "timestamps": []
+    }
+
+def _iter_grouped_videos(csv_file):
+    """Yield videos from a CSV whose rows are already grouped by video_id, one group at a time"""
+    finished = set()
+    video = None
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            video_id, timestamp = _transcript_row(row)
             if not video_id:
                 continue
-                
-            # Try to find youtuber_id
-            youtuber_id = row.get('youtuber_id', '')
-            
-            # Get text and timestamp - check multiple common column names
-            text = row.get('text', row.get('transcript', row.get('content', '')))
-            start_time_str = row.get('start_time', row.get('start', row.get('timestamp', row.get('time', '0'))))
-            end_time_str = row.get('end_time', row.get('end', '0'))
-            
-            start_time = parse_time_to_seconds(start_time_str)
-            end_time = parse_time_to_seconds(end_time_str)
-            
-            # Initialize video entry if not exists
-            if video_id not in video_map:
-                video_map[video_id] = {
-                    "youtuber_id": youtuber_id,
-                    "video_title": row.get('video_title', ''),
-                    "video_id": video_id,
-                    "video_url": row.get('video_url', f"https://youtube.com/watch?v={video_id}"),
-                    "publish_date": row.get('publish_date', ''),
-                    "duration": row.get('duration', ''),
-                    "timestamps": []
-                }
-            
-            # Add timestamp segment
-            if text:
-                video_map[video_id]["timestamps"].append({
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "text": text
-                })
-    
-    # Sort timestamps for each video and create final list
-    transcripts = []
-    for video_id in video_map:
-        video = video_map[video_id]
-        # Sort by start_time
-        video["timestamps"].sort(key=lambda x: x["start_time"])
+            if video is None or video_id != video['video_id']:
+                if video is not None:
+                    finished.add(video['video_id'])
+                    yield video
+                if video_id in finished:
+                    raise _VideosNotGrouped(video_id)
+                video = _video_header(row, video_id)
+            if timestamp:
+                video["timestamps"].append(timestamp)
+    if video is not None:
+        yield video
+
+def _iter_sorted_videos(csv_file, run_rows, temp_dir=None):
+    """
+    Yield videos from an ungrouped CSV with an external sort: rows are sorted in runs of
+    run_rows, spilled to temporary files, then k-way merged by (first appearance of the
+    video, start_time), so memory stays around one run regardless of file size.
+    """
+    order = {}  # video_id -> first-appearance ordinal, keeps the original video order
+    with tempfile.TemporaryDirectory(dir=temp_dir, prefix='csv2json-') as tmp:
+        runs = []
+        buffer = []
         
-        # Only add if we have at least one valid youtuber_id and video_id
+        def spill():
+            buffer.sort(key=lambda record: record[:4])
+            path = os.path.join(tmp, f"run{len(runs)}.jsonl")
+            with open(path, 'w', encoding='utf-8') as run:
+                for record in buffer:
+                    run.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+            runs.append(path)
+            buffer.clear()
+        
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            for seq, row in enumerate(csv.DictReader(f)):
+                video_id, timestamp = _transcript_row(row)
+                if not video_id:
+                    continue
+                ordinal = order.get(video_id)
+                if ordinal is None:
+                    ordinal = order[video_id] = len(order)
+                    buffer.append([ordinal, 0, 0, seq, _video_header(row, video_id)])  # Header sorts first
+                if timestamp:
+                    buffer.append([ordinal, 1, timestamp["start_time"], seq, timestamp])
+                if len(buffer) >= run_rows:
+                    spill()
+        order.clear()
+        if buffer:
+            spill()
+        print(f"   Sorted {len(runs)} runs, merging...")
+        
+        files = [open(path, 'r', encoding='utf-8') for path in runs]
+        try:
+            merged = heapq.merge(*((json.loads(line) for line in run) for run in files), key=lambda record: record[:4])
+            video, current = None, None
+            for ordinal, kind, _, _, value in merged:
+                if ordinal != current:
+                    if video is not None:
+                        yield video
+                    video, current = value, ordinal  # kind 0: the video header
+                elif kind == 1:
+                    video["timestamps"].append(value)
+            if video is not None:
+                yield video
+        finally:
+            for run in files:
+                run.close()
+
+def _open_output(output_file, compress):
+    if compress:
+        return gzip.open(output_file, 'wt', encoding='utf-8')
+    return open(output_file, 'w', encoding='utf-8')
+
+def _finished_videos(videos):
+    """Sort each video's timestamps by start_time (stable); only keep videos with a youtuber_id"""
+    for video in videos:
+        video["timestamps"].sort(key=lambda x: x["start_time"])
         if video['youtuber_id']:
-            transcripts.append(video)
+            yield video
+
+def _write_videos(videos, output_file, jsonl, compress):
+    """Write videos compactly (JSON array, one video per line, or JSON Lines); returns the count"""
+    count = 0
+    with _open_output(output_file, compress) as out:
+        if not jsonl:
+            out.write('[')
+        for video in _finished_videos(videos):
+            if jsonl:
+                out.write(json.dumps(video, ensure_ascii=False, separators=(',', ':')) + '\n')
+            else:
+                out.write((',\n' if count else '\n') + json.dumps(video, ensure_ascii=False, separators=(',', ':')))
+            count += 1
+        if not jsonl:
+            out.write('\n]\n')
+    return count
+
+def _write_output(videos, output_file, jsonl, compress):
+    """Write videos to output_file (as a corpus, or JSON via a temp file renamed at the end); returns the count"""
+    if is_corpus(output_file):
+        return write_corpus(_finished_videos(videos), output_file)
+    tmp_output = output_file + '.tmp'
+    count = _write_videos(videos, tmp_output, jsonl, compress)
+    os.replace(tmp_output, output_file)
+    return count
+
+def convert_transcripts_csv_to_json(csv_file, output_file, youtuber_id_map, grouped=None, jsonl=None,
+                                    compress=None, run_rows=500_000, temp_dir=None):
+    """
+    Convert Transcripts CSV to JSON format with support for multiple rows per video.
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(transcripts, f, ensure_ascii=False, indent=2)
+    Streams: videos are written as soon as they are complete, so memory doesn't grow with
+    the CSV size. If the rows are grouped by video_id each group is emitted when it ends;
+    otherwise rows go through an on-disk external sort/merge. Output is compact.
+    
+    Args:
+        grouped: True if rows are grouped by video_id, False to always sort externally.
+            None (default) streams groups and falls back to the external sort (restarting
+            the conversion) if a video_id reappears after its group ended.
+        jsonl: Write JSON Lines instead of a JSON array. Default: output_file ends with .jsonl(.gz).
+            An output_file ending with .corpus is written as a columnar corpus directory (see corpus.py).
+        compress: Gzip the output. Default: output_file ends with .gz.
+        run_rows: Rows per sorted run of the external sort.
+        temp_dir: Directory for the external sort's run files (default: system temp dir).
+    
+    Returns:
+        int: Number of videos written. This used to be the list of video dicts, which meant
+            holding the whole conversion in memory; callers that need the videos read them
+            back from output_file instead, e.g. with corpus.iter_videos(output_file), which
+            streams JSON, JSON Lines (.gz) and corpus outputs alike.
+    """
+    output_file = str(output_file)
+    if jsonl is None:
+        jsonl = is_jsonl(output_file)
+    if compress is None:
+        compress = output_file.endswith('.gz')
+    
+    count = None
+    if grouped is not False:
+        try:
+            count = _write_output(_iter_grouped_videos(csv_file), output_file, jsonl, compress)
+        except _VideosNotGrouped as e:
+            if grouped:
+                raise ValueError(f"{csv_file} is not grouped by video_id (video {e} reappears).") from e
+            print(f"   Rows are not grouped by video_id (video {e} reappears); using an external sort.")
+    if count is None:
+        count = _write_output(_iter_sorted_videos(csv_file, run_rows, temp_dir), output_file, jsonl, compress)
     
-    print(f"✅ Converted {len(transcripts)} videos (from multiple rows) to {output_file}")
-    return transcripts
+    print(f"✅ Converted {count} videos (from multiple rows) to {output_file}")
+    return count
 
 def main():
     print("🔄 CSV to JSON Converter for YouTube Arabic Search")
@@ -144,7 +284,7 @@ def main():
     if transcript_csv.exists():
         print("\n📝 Converting Transcripts...")
         print("⚠️  Note: You'll need to update youtuber_id values manually!")
-        transcripts = convert_transcripts_csv_to_json(
+        convert_transcripts_csv_to_json(
             transcript_csv,
             "src/data/transcripts.json",
             {}
@@ -0,0 +1,314 @@
+"""
+Columnar, memory-mappable corpus format used to hand transcripts between the
+converters, the loader and the indexers without re-parsing JSON.
+
+A corpus is a directory named '*.corpus':
+    meta.json         - format version and counts (written last, so a half-written corpus is never opened)
+    videos.json       - video-level metadata (everything but timestamps), one entry per video
+    video_segs.i8     - segment row range of each video: video i owns rows [video_segs[i], video_segs[i + 1])
+    start.f8, end.f8  - start_time / end_time of each segment
+    text.bin          - UTF-8 segment texts back to back, with text_offsets.i8 (count + 1 offsets)
+    norm.bin          - UTF-8 text_normalized back to back, with norm_offsets.i8
+    has_norm.u1       - 1 where the source timestamp had text_normalized (only those get it back)
+    time_flags.u1     - per segment, whether each time was an int or absent (segment_store.time_flags)
+    extras.json       - segment row -> timestamp fields the columns can't hold (other keys, non-numeric times)
+
+    python corpus.py transcripts.json transcripts.corpus            # convert any JSON/JSONL(.gz) export
+    python corpus.py transcripts.json transcripts.corpus --verify   # ...and check manifest hashes match
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from json_stream import iter_json_records
+from load_manifest import LoadManifest
+from segment_store import END_INT, END_MISSING, START_INT, START_MISSING, parse_time, time_flags, timestamp_extras
+
+FORMAT_VERSION = 3
+CORPUS_SUFFIX = '.corpus'
+
+
+def is_corpus(file_path: str) -> bool:
+    return str(file_path).rstrip('/\\').endswith(CORPUS_SUFFIX)
+
+
+def iter_videos(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Stream video dicts from a corpus directory or a JSON array / JSON Lines file (optionally gzipped)."""
+    if is_corpus(file_path):
+        return iter(Corpus(file_path))
+    return iter_json_records(file_path)
+
+
+class CorpusWriter:
+    """
+    Writes videos to a corpus directory as they arrive; only the video table is kept in memory.
+
+    Usage:
+    with CorpusWriter('transcripts.corpus') as writer:
+        for video in videos:
+            writer.add_video(video)
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Corpus directory (an existing corpus there is replaced).
+        """
+        self.path = str(path)
+        self.count = 0
+        self.video_count = 0
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(os.path.join(self.path, 'meta.json')):
+            os.remove(os.path.join(self.path, 'meta.json'))
+        self._files = {
+            name: open(os.path.join(self.path, name), 'wb', buffering=1 << 20)
+            for name in (
+                'video_segs.i8', 'start.f8', 'end.f8', 'text.bin', 'text_offsets.i8', 'norm.bin', 'norm_offsets.i8',
+                'has_norm.u1', 'time_flags.u1'
+            )
+        }
+        self._videos: List[Dict[str, Any]] = []
+        self._extras: Dict[str, Dict[str, Any]] = {}  # Segment row (as a JSON key) -> timestamp_extras
+        self._text_offset = 0
+        self._norm_offset = 0
+        for name in ('video_segs.i8', 'text_offsets.i8', 'norm_offsets.i8'):
+            self._files[name].write(np.zeros(1, dtype='<i8').tobytes())
+
+    def add_video(self, video: Dict[str, Any]) -> None:
+        """Append one video dict (its timestamps become segment rows, in order)."""
+        timestamps = video.get('timestamps') or []
+        self._videos.append({key: value for key, value in video.items() if key != 'timestamps'})
+        self.video_count += 1
+        starts = np.empty(len(timestamps), dtype='<f8')
+        ends = np.empty(len(timestamps), dtype='<f8')
+        text_offsets = np.empty(len(timestamps), dtype='<i8')
+        norm_offsets = np.empty(len(timestamps), dtype='<i8')
+        has_norm = np.empty(len(timestamps), dtype=np.uint8)
+        flags = np.empty(len(timestamps), dtype=np.uint8)
+        texts, norms = [], []
+        for i, ts in enumerate(timestamps):
+            text = ts.get('text') or ''
+            normalized = ts.get('text_normalized')
+            has_norm[i] = normalized is not None
+            if normalized is None:
+                normalized = ''  # Not derived here: the corpus must read back as the source did
+            starts[i] = parse_time(ts.get('start_time'), video, i, 'start_time')
+            ends[i] = parse_time(ts.get('end_time'), video, i, 'end_time')
+            flags[i] = time_flags(ts)
+            extra = timestamp_extras(ts)
+            if extra:
+                self._extras[str(self.count + i)] = extra
+            text = text.encode('utf-8')
+            normalized = normalized.encode('utf-8')
+            texts.append(text)
+            norms.append(normalized)
+            self._text_offset += len(text)
+            self._norm_offset += len(normalized)
+            text_offsets[i] = self._text_offset
+            norm_offsets[i] = self._norm_offset
+        self.count += len(timestamps)
+        files = self._files
+        files['video_segs.i8'].write(np.array([self.count], dtype='<i8').tobytes())
+        files['start.f8'].write(starts.tobytes())
+        files['end.f8'].write(ends.tobytes())
+        files['text.bin'].write(b''.join(texts))
+        files['norm.bin'].write(b''.join(norms))
+        files['text_offsets.i8'].write(text_offsets.tobytes())
+        files['norm_offsets.i8'].write(norm_offsets.tobytes())
+        files['has_norm.u1'].write(has_norm.tobytes())
+        files['time_flags.u1'].write(flags.tobytes())
+
+    def close(self) -> None:
+        """Flush the segment files and write the video table and meta.json."""
+        for f in self._files.values():
+            f.close()
+        with open(os.path.join(self.path, 'videos.json'), 'w', encoding='utf-8') as f:
+            json.dump(self._videos, f, ensure_ascii=False, separators=(',', ':'))
+        with open(os.path.join(self.path, 'extras.json'), 'w', encoding='utf-8') as f:
+            json.dump(self._extras, f, ensure_ascii=False, separators=(',', ':'))
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': 'corpus', 'version': FORMAT_VERSION, 'videos': self.video_count, 'segments': self.count,
+                'text_bytes': self._text_offset, 'norm_bytes': self._norm_offset
+            }, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_corpus(videos: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    Write videos to a corpus directory, replacing it only once the new corpus is complete.
+
+    Returns:
+        int: Number of videos written.
+    """
+    path = str(path).rstrip('/\\')
+    tmp_path = path + '.tmp'
+    if os.path.isdir(tmp_path):
+        shutil.rmtree(tmp_path)
+    try:
+        with CorpusWriter(tmp_path) as writer:
+            for video in videos:
+                writer.add_video(video)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return writer.video_count
+
+
+class Corpus(Sequence):
+    """
+    Read side of a corpus: a sequence of video dicts backed by memory-mapped columns.
+
+    Opening parses only the video table (and the extras table, usually empty).
+    start_times/end_times and the offset arrays are zero-copy views of the files; a text is
+    decoded only when its video (or segment) is accessed, so stages that only need times or
+    a subset of videos never touch the rest.
+
+    Usage:
+    corpus = Corpus('transcripts.corpus')
+    video = corpus[0]                    # same dict shape as the JSON export
+    for video in corpus: ...
+    corpus.start_times[corpus.segment_range(0)]
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        with open(os.path.join(self.path, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format') != 'corpus' or meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} corpus.")
+        with open(os.path.join(self.path, 'videos.json'), 'r', encoding='utf-8') as f:
+            self.videos: List[Dict[str, Any]] = json.load(f)
+        self.count = meta['segments']
+        self.video_segs = self._memmap('video_segs.i8', '<i8', len(self.videos) + 1)
+        self.start_times = self._memmap('start.f8', '<f8', self.count)
+        self.end_times = self._memmap('end.f8', '<f8', self.count)
+        self._text = self._memmap('text.bin', np.uint8, meta['text_bytes'])
+        self._text_offsets = self._memmap('text_offsets.i8', '<i8', self.count + 1)
+        self._norm = self._memmap('norm.bin', np.uint8, meta['norm_bytes'])
+        self._norm_offsets = self._memmap('norm_offsets.i8', '<i8', self.count + 1)
+        self._has_norm = self._memmap('has_norm.u1', np.uint8, self.count)
+        self._time_flags = self._memmap('time_flags.u1', np.uint8, self.count)
+        with open(os.path.join(self.path, 'extras.json'), 'r', encoding='utf-8') as f:
+            self._extras: Dict[int, Dict[str, Any]] = {int(row): extra for row, extra in json.load(f).items()}
+
+    def _memmap(self, name: str, dtype, length: int) -> np.ndarray:
+        if not length:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode='r', shape=(length,))
+
+    def __len__(self) -> int:
+        return len(self.videos)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Corpus index out of range.")
+        return {**self.videos[index], 'timestamps': self.timestamps(index)}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def segment_range(self, index: int) -> slice:
+        """Segment rows of the video at index."""
+        return slice(int(self.video_segs[index]), int(self.video_segs[index + 1]))
+
+    def text(self, row: int) -> str:
+        return self._text[self._text_offsets[row]:self._text_offsets[row + 1]].tobytes().decode('utf-8')
+
+    def timestamps(self, index: int) -> List[Dict[str, Any]]:
+        """Timestamp dicts of the video at index, with the fields and time types the source had."""
+        rows = self.segment_range(index)
+        if rows.start == rows.stop:
+            return []
+        text_offsets = self._text_offsets[rows.start:rows.stop + 1]
+        norm_offsets = self._norm_offsets[rows.start:rows.stop + 1]
+        # One decode per video: slice the video's bytes once, then cut the texts
+        texts = self._text[text_offsets[0]:text_offsets[-1]].tobytes()
+        norms = self._norm[norm_offsets[0]:norm_offsets[-1]].tobytes()
+        text_cuts = (text_offsets - text_offsets[0]).tolist()
+        norm_cuts = (norm_offsets - norm_offsets[0]).tolist()
+        has_norm = self._has_norm[rows].tolist()
+        flags = self._time_flags[rows].tolist()
+        timestamps = []
+        for i, (start, end) in enumerate(zip(self.start_times[rows].tolist(), self.end_times[rows].tolist())):
+            ts = {}
+            if not flags[i] & START_MISSING:
+                ts['start_time'] = int(start) if flags[i] & START_INT else start
+            if not flags[i] & END_MISSING:
+                ts['end_time'] = int(end) if flags[i] & END_INT else end
+            ts['text'] = texts[text_cuts[i]:text_cuts[i + 1]].decode('utf-8')
+            if has_norm[i]:
+                ts['text_normalized'] = norms[norm_cuts[i]:norm_cuts[i + 1]].decode('utf-8')
+            extra = self._extras.get(rows.start + i)
+            if extra:
+                ts.update(extra)
+            timestamps.append(ts)
+        return timestamps
+
+
+def verify_corpus(source_file: str, corpus_path: str) -> List[str]:
+    """
+    Compare a corpus with the export it was written from, video by video, using the load
+    manifest's content hash (so a source switch doesn't trigger re-uploads).
+
+    Returns:
+        List[str]: Mismatch descriptions; empty if every video hashes the same.
+    """
+    corpus = Corpus(corpus_path)
+    mismatches = []
+    count = 0
+    for index, video in enumerate(iter_videos(source_file)):
+        count += 1
+        if index >= len(corpus):
+            continue
+        if LoadManifest.video_hash(video) != LoadManifest.video_hash(corpus[index]):
+            mismatches.append(f"video #{index} ({video.get('video_id', '')}) hashes differently")
+    if count != len(corpus):
+        mismatches.append(f"{source_file} has {count} videos, the corpus {len(corpus)}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a transcript export to a columnar corpus directory")
+    parser.add_argument('input_file', help="INPUT(.json|.jsonl[.gz]|.corpus)")
+    parser.add_argument('output_path', help="OUTPUT.corpus")
+    parser.add_argument('--verify', action='store_true', help="Check every video hashes the same as in the input")
+    args = parser.parse_args()
+    if not is_corpus(args.output_path):
+        print(f"❌ Output must be a '{CORPUS_SUFFIX}' directory.")
+        sys.exit(1)
+    started = time.perf_counter()
+    count = write_corpus(iter_videos(args.input_file), args.output_path)
+    print(f"✅ Wrote {count} videos to {args.output_path} in {time.perf_counter() - started:.1f}s")
+    if args.verify:
+        mismatches = verify_corpus(args.input_file, args.output_path)
+        for mismatch in mismatches[:20]:
+            print(f"   ❌ {mismatch}")
+        if mismatches:
+            sys.exit(1)
+        print("✅ Every video hashes the same as in the input")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,319 @@
-import pandas as pd
+import csv
+import os
+import queue
+import threading
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+BATCH_ROWS = 1000  # Rows handed to a part's writer thread at a time
+
+
+class _GroupsNotContiguous(Exception):
+    """A group key reappeared after its rows ended (input is not grouped)."""
+
+
+class _PartWriter:
+    """One output part: rows queued in batches and written to disk by a background thread."""
+
+    def __init__(self, output_file: str, header: List[str]):
+        self.output_file = output_file
+        self.rows = 0
+        self.bytes = 0
+        self._batch: List[List[str]] = []
+        self._queue: queue.Queue = queue.Queue(maxsize=8)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, args=(header,), daemon=True)
+        self._thread.start()
+
+    def add(self, rows: List[List[str]], size: int) -> None:
+        self.rows += len(rows)
+        self.bytes += size
+        self._batch.extend(rows)
+        if len(self._batch) >= BATCH_ROWS:
+            self._queue.put(self._batch)
+            self._batch = []
+
+    def _run(self, header: List[str]) -> None:
+        try:
+            with open(self.output_file, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(header)
+                while True:
+                    batch = self._queue.get()
+                    if batch is None:
+                        return
+                    writer.writerows(batch)
+        except BaseException as e:
+            self._error = e
+            while self._queue.get() is not None:  # Keep draining so the reader never blocks
+                pass
+
+    def close(self) -> None:
+        if self._batch:
+            self._queue.put(self._batch)
+            self._batch = []
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
 
 class CSVDivider:
     """
-    A class to read a CSV file and divide it into 2 or 3 output CSV files.
-    
+    A class to stream a CSV file and divide it into N output CSV files without ever
+    splitting a group of rows (by default all rows of one video_id) across files.
+
+    Parts are sized by count (num_parts, balanced by bytes), by rows_per_part or by
+    bytes_per_part. Memory stays constant apart from one group of rows (and, when sizing
+    groups, a few numbers per group); each part's disk writes run on a background thread
+    so they overlap parsing. Every part is a standalone CSV with the original header that
+    can be converted and loaded on a separate worker.
+
     Usage:
     divider = CSVDivider('input.csv')
-    df = divider.read()
-    divider.write(num_parts=2, output_prefix='output_part')
+    files = divider.write(num_parts=8, output_prefix='output_part')
+    files = divider.write(bytes_per_part=256 * 1024 * 1024)
     """
-    
-    def __init__(self, input_file: str):
+
+    def __init__(self, input_file: str, group_by: Optional[str] = 'video_id'):
         """
         Initialize with the input CSV file path.
-        
+
         Args:
             input_file (str): Path to the input CSV file.
+            group_by (Optional[str]): Column whose rows always go to the same part. Default is 'video_id';
+                None (or a column the CSV doesn't have) splits at any row.
         """
         self.input_file = input_file
+        self.group_by = group_by
         self.df = None
-    
-    def read(self) -> pd.DataFrame:
+
+    def read(self):
         """
-        Read the input CSV file into a pandas DataFrame.
-        
+        Read the input CSV file into a pandas DataFrame (not needed by write(), which streams the file).
+
         Returns:
             pd.DataFrame: The loaded DataFrame.
         """
+        import pandas as pd
         self.df = pd.read_csv(self.input_file)
         return self.df
-    
-    def write(self, num_parts: int = 2, output_prefix: str = 'output_part') -> None:
+
+    def write(
+        self,
+        num_parts: int = 2,
+        output_prefix: str = 'output_part',
+        rows_per_part: Optional[int] = None,
+        bytes_per_part: Optional[int] = None
+    ) -> List[str]:
         """
-        Divide the DataFrame into the specified number of parts (2 or 3) and write each to a separate CSV file.
-        
+        Divide the input into parts and write each to a separate CSV file.
+
+        With num_parts, a first pass sizes every group; each part then targets the bytes
+        still unassigned divided by the parts still to fill, so exactly num_parts files are
+        written whenever there are at least that many groups. With rows_per_part or
+        bytes_per_part, a grouped file is split in a single pass (falling back to sizing
+        the groups first if a group key reappears after its rows ended). A part ends before
+        a group whenever that leaves it closer to its target than adding the group would.
+
         Args:
-            num_parts (int): Number of parts to divide into (must be 2 or 3). Default is 2.
+            num_parts (int): Number of parts, balanced by bytes; used when neither
+                rows_per_part nor bytes_per_part is set. Default is 2.
             output_prefix (str): Prefix for output file names (e.g., 'output_part_1.csv'). Default is 'output_part'.
-        
+            rows_per_part (Optional[int]): Target rows per part (any number of parts).
+            bytes_per_part (Optional[int]): Target UTF-8 bytes per part (any number of parts).
+
+        Returns:
+            List[str]: The written part files, in order.
+
         Raises:
-            ValueError: If DataFrame is not loaded or num_parts is not 2 or 3.
-        """
-        if self.df is None:
-            raise ValueError("Please call read() first to load the DataFrame.")
-        
-        if num_parts not in [2, 3]:
-            raise ValueError("num_parts must be 2 or 3.")
-        
-        total_rows = len(self.df)
-        rows_per_part = total_rows // num_parts
-        
-        for i in range(num_parts):
-            start_idx = i * rows_per_part
-            end_idx = (i + 1) * rows_per_part if i < num_parts - 1 else total_rows
-            part_df = self.df.iloc[start_idx:end_idx]
-            
-            output_file = f"{output_prefix}_{i+1}.csv"
-            part_df.to_csv(output_file, index=False)
-            print(f"Wrote part {i+1} to {output_file} ({len(part_df)} rows)")
-        
-        print(f"Successfully divided input into {num_parts} parts.")
+            ValueError: If the targets are not positive or both rows_per_part and bytes_per_part are set.
+        """
+        if rows_per_part is not None and bytes_per_part is not None:
+            raise ValueError("Set rows_per_part or bytes_per_part, not both.")
+        if any(target is not None and target < 1 for target in (rows_per_part, bytes_per_part)):
+            raise ValueError("rows_per_part and bytes_per_part must be positive.")
+        max_parts = None
+        if rows_per_part is None and bytes_per_part is None:
+            if num_parts < 1:
+                raise ValueError("num_parts must be at least 1.")
+            max_parts = num_parts
+
+        header = self._header()
+        if header is None:
+            print("No data to write.")
+            return []
+        key_column = header.index(self.group_by) if self.group_by in header else None
+        targets = (max_parts, rows_per_part, bytes_per_part)
+        if max_parts is not None:
+            parts = self._split_planned(output_prefix, header, key_column, targets)
+        else:
+            try:
+                parts = self._split_streaming(output_prefix, header, key_column, rows_per_part or bytes_per_part, bool(rows_per_part))
+            except _GroupsNotContiguous as e:
+                print(f"Rows are not grouped by {self.group_by} ({e} reappears); sizing groups first.")
+                parts = self._split_planned(output_prefix, header, key_column, targets)
+
+        for i, part in enumerate(parts, start=1):
+            print(f"Wrote part {i} to {part.output_file} ({part.rows} rows)")
+        print(f"Successfully divided input into {len(parts)} parts.")
+        return [part.output_file for part in parts]
+
+    def _header(self) -> Optional[List[str]]:
+        with open(self.input_file, 'r', encoding='utf-8-sig', newline='') as f:
+            return next(csv.reader(f), None)
+
+    def _rows(self, key_column: Optional[int]) -> Iterator[Tuple[List[str], str, int]]:
+        """(row, group key or '', UTF-8 size) for every data row."""
+        with open(self.input_file, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                key = row[key_column] if key_column is not None and key_column < len(row) else ''
+                yield row, key, sum(len(field.encode('utf-8')) for field in row) + len(row)
+
+    def _groups(self, key_column: Optional[int]) -> Iterator[Tuple[List[List[str]], int]]:
+        """
+        (rows, UTF-8 size) of each run of rows sharing a group key; rows without a key stay
+        with the run before them. Raises _GroupsNotContiguous if a key reappears.
+        """
+        seen = set()
+        rows: List[List[str]] = []
+        size = 0
+        current_key = None
+        for row, key, row_size in self._rows(key_column):
+            starts_group = key_column is None or (key and key != current_key)
+            if rows and starts_group:
+                yield rows, size
+                rows, size = [], 0
+            if key and key != current_key:
+                if key in seen:
+                    raise _GroupsNotContiguous(key)
+                seen.add(key)
+                current_key = key
+            rows.append(row)
+            size += row_size
+        if rows:
+            yield rows, size
+
+    @staticmethod
+    def _ends_part(current: float, group: float, target: float) -> bool:
+        """Whether a part holding `current` should end before a group of size `group` (same unit as target)."""
+        return current > 0 and (current >= target or current + group - target > target - current)
+
+    @staticmethod
+    def _close_all(parts: List[_PartWriter], remove: bool = False) -> None:
+        errors = []
+        for part in parts:
+            try:
+                part.close()
+            except BaseException as e:
+                errors.append(e)
+            if remove and os.path.exists(part.output_file):
+                os.remove(part.output_file)
+        if errors and not remove:
+            raise errors[0]
+
+    def _split_streaming(
+        self, output_prefix: str, header: List[str], key_column: Optional[int], target: int, by_rows: bool
+    ) -> List[_PartWriter]:
+        """Single pass for grouped input and a fixed rows/bytes target per part."""
+        parts: List[_PartWriter] = []
+        try:
+            current = None
+            for rows, size in self._groups(key_column):
+                if current is None or self._ends_part(
+                    current.rows if by_rows else current.bytes, len(rows) if by_rows else size, target
+                ):
+                    current = _PartWriter(f"{output_prefix}_{len(parts) + 1}.csv", header)
+                    parts.append(current)
+                current.add(rows, size)
+        except BaseException:
+            self._close_all(parts, remove=True)
+            raise
+        self._close_all(parts)
+        return parts
+
+    def _group_sizes(self, key_column: Optional[int]) -> Tuple[Dict[str, int], array, array]:
+        """
+        Sizing pass: group key -> group number (first-appearance order), plus rows and
+        bytes per group number. Without a key column every row is its own group.
+        """
+        numbers: Dict[str, int] = {}
+        group_rows, group_bytes = array('q'), array('q')
+        number = -1
+        for row_index, (row, key, size) in enumerate(self._rows(key_column)):
+            if key_column is None:
+                number = row_index
+            elif key or number < 0:
+                number = numbers.get(key, -1)  # Leading rows without a key form the '' group
+                if number < 0:
+                    number = numbers[key] = len(group_rows)
+            if number == len(group_rows):
+                group_rows.append(0)
+                group_bytes.append(0)
+            group_rows[number] += 1
+            group_bytes[number] += size
+        return numbers, group_rows, group_bytes
+
+    def _assign_parts(self, group_rows: array, group_bytes: array, targets: tuple) -> array:
+        """Part index of every group number."""
+        max_parts, rows_per_part, bytes_per_part = targets
+        sizes = group_rows if rows_per_part else group_bytes
+        remaining = sum(sizes)  # Not yet in a closed part
+        plan = array('I')
+        part, current = 0, 0
+        for number, size in enumerate(sizes):
+            if max_parts is None:
+                end = self._ends_part(current, size, rows_per_part or bytes_per_part)
+            else:
+                parts_left = max_parts - part  # Including the current part
+                groups_left = len(sizes) - number  # Including this group
+                end = current > 0 and parts_left > 1 and (
+                    groups_left < parts_left  # Every later part still needs a group
+                    or self._ends_part(current, size, remaining / parts_left)
+                )
+            if end:
+                remaining -= current
+                part, current = part + 1, 0
+            plan.append(part)
+            current += size
+        return plan
+
+    def _split_planned(
+        self, output_prefix: str, header: List[str], key_column: Optional[int], targets: tuple
+    ) -> List[_PartWriter]:
+        """Size the groups in one pass, assign whole groups to parts, then route the rows in a second pass."""
+        numbers, group_rows, group_bytes = self._group_sizes(key_column)
+        plan = self._assign_parts(group_rows, group_bytes, targets)
+        parts: List[_PartWriter] = []
+        try:
+            for i in range((max(plan) + 1) if plan else 0):
+                parts.append(_PartWriter(f"{output_prefix}_{i + 1}.csv", header))
+            number = -1
+            for row_index, (row, key, size) in enumerate(self._rows(key_column)):
+                if key_column is None:
+                    number = row_index
+                elif key or number < 0:
+                    number = numbers[key]  # Rows without a key stay with the previous group
+                parts[plan[number]].add([row], size)
+        except BaseException:
+            self._close_all(parts, remove=True)
+            raise
+        self._close_all(parts)
+        return parts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Split a CSV into parts without splitting any video_id group")
+    parser.add_argument('input_file')
+    parser.add_argument('--parts', type=int, default=2, help="Number of parts (ignored with --rows/--bytes)")
+    parser.add_argument('--rows', type=int, help="Target rows per part")
+    parser.add_argument('--bytes', type=int, help="Target bytes per part")
+    parser.add_argument('--prefix', default='output_part')
+    parser.add_argument('--group-by', default='video_id', help="Column kept within one part ('' to split anywhere)")
+    args = parser.parse_args()
+
+    CSVDivider(args.input_file, args.group_by or None).write(args.parts, args.prefix, args.rows, args.bytes)
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from arabic_normalize import normalize_arabic
+
+
+class EmbeddingCache:
+    """
+    Persistent on-disk cache of text embeddings, keyed by model name + normalized text hash.
+
+    Vectors live in a memory-mapped float32 matrix (one row per cached text) and a JSON
+    index maps each text hash to its row. Each model gets its own sub-directory, so
+    switching models never returns stale vectors. Once max_entries is reached the
+    least-recently-used rows are evicted and reused.
+
+    Usage:
+    cache = EmbeddingCache('.embedding_cache', 'paraphrase-multilingual-MiniLM-L12-v2')
+    found = cache.get_many(texts)          # {text: vector} for cached texts
+    cache.put_many(missing, vectors)       # store freshly encoded vectors
+    cache.flush()
+    print(cache.stats())
+    """
+
+    INITIAL_ROWS = 4096
+
+    def __init__(self, cache_dir: str, model_name: str, max_entries: int = 1_000_000):
+        """
+        Open (or create) the cache for one model.
+
+        Args:
+            cache_dir (str): Root directory of the cache.
+            model_name (str): Embedding model name; part of every key.
+            max_entries (int): Maximum cached texts before LRU eviction. Default is 1,000,000.
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.path = os.path.join(cache_dir, re.sub(r'[^\w.-]+', '_', model_name))
+        self.index_file = os.path.join(self.path, 'index.json')
+        self.vectors_file = os.path.join(self.path, 'vectors.f32')
+        os.makedirs(self.path, exist_ok=True)
+
+        self.dim: Optional[int] = None
+        self._rows: OrderedDict = OrderedDict()  # hash -> row, least recently used first
+        self._free_rows: List[int] = []
+        self._next_row = 0
+        self._matrix: Optional[np.memmap] = None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('model_name') == model_name:
+                self.dim = index['dim']
+                self._rows = OrderedDict(index['rows'])
+                self._free_rows = index.get('free_rows', [])
+                self._next_row = index.get('next_row', len(self._rows))
+                self._open_matrix(max(self._next_row, 1))
+                while len(self._rows) > self.max_entries:
+                    self._evict()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize text before hashing (Unicode NFC + Arabic normalization), so spelling variants share a row."""
+        return normalize_arabic(unicodedata.normalize('NFC', text))
+
+    def key(self, text: str) -> str:
+        """Cache key for a text under this cache's model."""
+        data = f"{self.model_name}\0{self.normalize(text)}".encode('utf-8')
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def get_many(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up texts in the cache.
+
+        Returns:
+            Dict[str, np.ndarray]: Vector for every text that was cached; misses are left out.
+        """
+        found = {}
+        for text in texts:
+            key = self.key(text)
+            row = self._rows.get(key)
+            if row is None:
+                self.misses += 1
+                continue
+            self._rows.move_to_end(key)
+            found[text] = np.array(self._matrix[row])
+            self.hits += 1
+        return found
+
+    def put_many(self, texts: List[str], vectors) -> None:
+        """Store freshly encoded vectors, evicting least-recently-used rows if the cache is full."""
+        if not texts:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            self._open_matrix(min(self.INITIAL_ROWS, self.max_entries))
+        for text, vector in zip(texts, vectors):
+            key = self.key(text)
+            row = self._rows.get(key)
+            if row is None:
+                while len(self._rows) >= self.max_entries:
+                    self._evict()
+                row = self._allocate_row()
+                self._rows[key] = row
+            else:
+                self._rows.move_to_end(key)
+            self._matrix[row] = vector
+        self._dirty = True
+
+    def flush(self) -> None:
+        """Write vectors and the hash->row index to disk."""
+        if not self._dirty or self._matrix is None:
+            return
+        self._matrix.flush()
+        index = {
+            'model_name': self.model_name,
+            'dim': self.dim,
+            'next_row': self._next_row,
+            'free_rows': self._free_rows,
+            'rows': list(self._rows.items())
+        }
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(tmp_file, self.index_file)
+        self._dirty = False
+
+    def stats(self) -> Dict[str, float]:
+        """Lookup counters for this session plus the current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._rows),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def _open_matrix(self, rows: int) -> None:
+        """Map the vector file with room for at least `rows` rows, growing the file if needed."""
+        size = rows * self.dim * 4
+        mode = 'r+' if os.path.exists(self.vectors_file) else 'w+'
+        if mode == 'r+' and os.path.getsize(self.vectors_file) < size:
+            with open(self.vectors_file, 'r+b') as f:
+                f.truncate(size)
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._matrix = np.memmap(self.vectors_file, dtype=np.float32, mode=mode, shape=(rows, self.dim))
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        row = self._next_row
+        if row >= self._matrix.shape[0]:
+            self._open_matrix(min(max(row * 2, self.INITIAL_ROWS), self.max_entries))
+        self._next_row += 1
+        return row
+
+    def _evict(self) -> None:
+        _, row = self._rows.popitem(last=False)
+        self._free_rows.append(row)
+        self.evictions += 1
@@ -0,0 +1,128 @@
+"""
+Multi-process CPU embedding: one SentenceTransformer per worker process, with batches
+sharded across workers and results returned in input order.
+"""
+
+import multiprocessing
+import os
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+_model = None  # The worker process's model, loaded once by _init_worker
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    global _model
+    try:
+        import torch
+        torch.set_num_threads(threads)  # Workers share the cores instead of each grabbing all of them
+    except ImportError:
+        pass
+    from sentence_transformers import SentenceTransformer
+    _model = SentenceTransformer(model_name, device='cpu')
+
+
+def _encode_shard(texts: List[str], batch_size: int) -> Tuple[int, np.ndarray, float]:
+    started = time.perf_counter()
+    vectors = np.asarray(_model.encode(texts, batch_size=batch_size), dtype=np.float32)
+    return os.getpid(), vectors, time.perf_counter() - started
+
+
+def _dimension(_: Any = None) -> int:
+    return _model.get_sentence_embedding_dimension()
+
+
+class EmbeddingPool:
+    """
+    Drop-in replacement for a CPU SentenceTransformer that encodes on several processes.
+
+    encode() splits its input into shards of shard_size texts, hands them to idle
+    workers (imap keeps the input order) and concatenates the results. Per-worker text
+    counts and encode time are tracked for stats().
+
+    Usage:
+    pool = EmbeddingPool('paraphrase-multilingual-MiniLM-L12-v2', workers=32)
+    vectors = pool.encode(texts)
+    print(pool.stats())
+    pool.close()
+    """
+
+    def __init__(self, model_name: str, workers: Optional[int] = None, shard_size: int = 64):
+        """
+        Start the worker processes (each loads the model once).
+
+        Args:
+            model_name (str): SentenceTransformer model name.
+            workers (Optional[int]): Worker processes. Default is os.cpu_count().
+            shard_size (int): Texts per task handed to a worker. Default is 64.
+        """
+        self.model_name = model_name
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        # spawn: forking a process that already imported torch can deadlock
+        context = multiprocessing.get_context('spawn')
+        self._pool = context.Pool(self.workers, initializer=_init_worker, initargs=(model_name, threads))
+        self._dim: Optional[int] = None
+        self._worker_stats: Dict[int, List[float]] = {}  # pid -> [texts, seconds]
+        self._wall_time = 0.0
+        self._texts = 0
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dim is None:
+            self._dim = self._pool.apply(_dimension)
+        return self._dim
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """
+        Encode texts across the workers, in input order.
+
+        Args:
+            texts: A text or a list of texts.
+            batch_size (int): Model batch size inside each worker. Default is 32.
+
+        Returns:
+            np.ndarray: One float32 row per text (a single vector for a single text).
+        """
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        started = time.perf_counter()
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        results = []
+        for pid, vectors, elapsed in self._pool.imap(partial(_encode_shard, batch_size=batch_size), shards):
+            worker = self._worker_stats.setdefault(pid, [0, 0.0])
+            worker[0] += len(vectors)
+            worker[1] += elapsed
+            results.append(vectors)
+        self._wall_time += time.perf_counter() - started
+        self._texts += len(texts)
+        vectors = np.concatenate(results)
+        return vectors[0] if single else vectors
+
+    def stats(self) -> Dict[str, Any]:
+        """Overall and per-worker throughput (texts/sec while encoding) since the pool started."""
+        return {
+            'workers': self.workers,
+            'texts': self._texts,
+            'texts_per_sec': self._texts / self._wall_time if self._wall_time else 0.0,
+            'per_worker': [
+                {'pid': pid, 'texts': int(texts), 'texts_per_sec': texts / seconds if seconds else 0.0}
+                for pid, (texts, seconds) in sorted(self._worker_stats.items())
+            ]
+        }
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,6 +1,14 @@
+import csv
 import json
-import pandas as pd
-from typing import List, Dict, Any
+import os
+import time
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+from corpus import Corpus, is_corpus, iter_videos
+from json_stream import open_text
+from segment_store import SegmentStore
+
+CSV_COLUMNS = ('youtuber_id', 'video_title', 'video_url', 'video_id', 'publish_date', 'duration', 'start_time', 'end_time', 'text')
 
 class JSONToCSVConverter:
     """
@@ -35,6 +43,9 @@ class JSONToCSVConverter:
     converter = JSONToCSVConverter('input.json')
     data = converter.read()
     converter.write('output.csv')
+    
+    # Large exports: stream videos from the file instead of loading them all
+    JSONToCSVConverter('input.json').write('output.csv', stream=True)
     """
     
     def __init__(self, input_file: str):
@@ -47,9 +58,13 @@ class JSONToCSVConverter:
         self.input_file = input_file
         self.data: List[Dict[str, Any]] = None
     
-    def read(self) -> List[Dict[str, Any]]:
+    def read(self, compact: bool = False) -> List[Dict[str, Any]]:
         """
-        Read the input JSON file into a list of dictionaries.
+        Read the input JSON file into a list of dictionaries (a '.corpus' directory is opened memory-mapped).
+        
+        Args:
+            compact (bool): Parse incrementally into a SegmentStore (array-backed, built on access)
+                instead of a list of dicts. Default is False.
         
         Returns:
             List[Dict[str, Any]]: The loaded list of video objects.
@@ -57,7 +72,13 @@ class JSONToCSVConverter:
         Raises:
             ValueError: If the file is not a valid JSON list.
         """
-        with open(self.input_file, 'r', encoding='utf-8') as f:
+        if is_corpus(self.input_file):
+            self.data = Corpus(self.input_file)
+            return self.data
+        if compact:
+            self.data = SegmentStore.from_videos(iter_videos(self.input_file))
+            return self.data
+        with open_text(self.input_file) as f:
             self.data = json.load(f)
         
         if not isinstance(self.data, list):
@@ -65,51 +86,125 @@ class JSONToCSVConverter:
         
         return self.data
     
-    def write(self, output_file: str = 'output.csv') -> None:
+    def write(self, output_file: str = 'output.csv', stream: bool = False) -> int:
         """
-        Flatten the loaded data (video metadata repeated for each timestamp) and write to CSV.
+        Flatten the videos (video metadata repeated for each timestamp) and write to CSV.
+        
+        Rows go straight through a buffered csv writer, so only one video is in memory at
+        a time beyond the loaded data. With stream=True the input file is parsed
+        incrementally instead of via read(), keeping memory constant for any file size.
+        
+        Values are formatted as pandas' to_csv formatted them: a column holding only ints
+        and floats (or nulls) is a float column there, so its ints are written as e.g. '1.0'.
+        Such a column is only known at the end, so in that (rare) case the rows are written
+        a second time.
         
         Args:
             output_file (str): Path for the output CSV file. Default is 'output.csv'.
+            stream (bool): Read videos incrementally from input_file (no read() needed). Default is False.
+        
+        Returns:
+            int: Number of rows written.
         
         Raises:
-            ValueError: If data is not loaded.
+            ValueError: If data is not loaded (and stream is False).
         """
-        if self.data is None:
+        if not stream and self.data is None:
             raise ValueError("Please call read() first to load the data.")
         
-        flattened_rows = []
-        for video in self.data:
-            video_base = {
-                'youtuber_id': video.get('youtuber_id', ''),
-                'video_title': video.get('video_title', ''),
-                'video_url': video.get('video_url', ''),
-                'video_id': video.get('video_id', ''),
-                'publish_date': video.get('publish_date', ''),
-                'duration': video.get('duration', '')
-            }
+        started = time.perf_counter()
+        tmp_file = f"{output_file}.tmp"
+        try:
+            kinds = [0] * len(CSV_COLUMNS)
+            rows = self._write_rows(tmp_file, self._iter_rows(self._videos(stream), kinds))
+            float_columns = [i for i, kind in enumerate(kinds) if kind & _INT and kind & _FLOAT and not kind & _OTHER]
+            if float_columns:
+                self._write_rows(tmp_file, self._as_floats(self._iter_rows(self._videos(stream)), float_columns))
+        except BaseException:
+            if os.path.exists(tmp_file):  # open() itself may have failed
+                os.remove(tmp_file)
+            raise
+        
+        if not rows:
+            os.remove(tmp_file)
+            print("No data to write.")
+            return 0
+        os.replace(tmp_file, output_file)
+        elapsed = time.perf_counter() - started
+        print(f"Successfully wrote {rows} rows to {output_file} in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/sec)")
+        return rows
+    
+    def _videos(self, stream: bool) -> Iterable[Dict[str, Any]]:
+        return iter_videos(self.input_file) if stream else self.data
+    
+    @staticmethod
+    def _write_rows(file_path: str, rows: Iterable[tuple]) -> int:
+        count = 0
+        with open(file_path, 'w', encoding='utf-8', newline='', buffering=1 << 20) as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(CSV_COLUMNS)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        return count
+    
+    @staticmethod
+    def _iter_rows(videos: Iterable[Dict[str, Any]], kinds: Optional[List[int]] = None) -> Iterator[tuple]:
+        """
+        One CSV row (in CSV_COLUMNS order) per timestamp; one row with empty timestamp fields for
+        videos without any. With kinds, ORs each column's value kinds (_INT/_FLOAT/_OTHER) into it.
+        """
+        kind_of = _KINDS.get
+        for video in videos:
+            video_base = (
+                video.get('youtuber_id', ''),
+                video.get('video_title', ''),
+                video.get('video_url', ''),
+                video.get('video_id', ''),
+                video.get('publish_date', ''),
+                video.get('duration', '')
+            )
+            if kinds is not None:
+                for i, value in enumerate(video_base):
+                    kinds[i] |= kind_of(type(value), _OTHER)
             
             timestamps = video.get('timestamps', [])
             if not timestamps:
-                # If no timestamps, add a row with empty timestamp fields
-                flattened_rows.append({**video_base, 'start_time': '', 'end_time': '', 'text': ''})
+                if kinds is not None:
+                    kinds[6] |= _OTHER
+                    kinds[7] |= _OTHER
+                    kinds[8] |= _OTHER
+                yield video_base + ('', '', '')
             else:
                 for ts in timestamps:
-                    row = {
-                        **video_base,
-                        'start_time': ts.get('start_time', ''),
-                        'end_time': ts.get('end_time', ''),
-                        'text': ts.get('text', '')
-                    }
-                    flattened_rows.append(row)
-        
-        if flattened_rows:
-            df = pd.DataFrame(flattened_rows)
-            df.to_csv(output_file, index=False, encoding='utf-8')
-            print(f"Successfully wrote {len(flattened_rows)} rows to {output_file}")
-        else:
-            print("No data to write.")
-# Assuming you have a file 'input.json' with the described structure
-converter = JSONToCSVConverter('/home/saad/Desktop/search_trans_app/transcripts/ready_to_upload/Arnest William/ready_to_uppload_Arnest_lives.json')
-data = converter.read()  # Loads the list of dicts
-converter.write('videos_with_timestamps.csv')  # Outputs a flattened CSV
\ No newline at end of file
+                    row = (ts.get('start_time', ''), ts.get('end_time', ''), ts.get('text', ''))
+                    if kinds is not None:
+                        kinds[6] |= kind_of(type(row[0]), _OTHER)
+                        kinds[7] |= kind_of(type(row[1]), _OTHER)
+                        kinds[8] |= kind_of(type(row[2]), _OTHER)
+                    yield video_base + row
+    
+    @staticmethod
+    def _as_floats(rows: Iterable[tuple], columns: List[int]) -> Iterator[tuple]:
+        """Rows with the ints of the given columns as floats."""
+        for row in rows:
+            row = list(row)
+            for i in columns:
+                if type(row[i]) is int:
+                    row[i] = float(row[i])
+            yield tuple(row)
+
+
+# Value kinds per CSV column, as pandas infers a column's dtype from them
+_INT, _FLOAT, _OTHER = 1, 2, 4
+_KINDS = {int: _INT, float: _FLOAT, type(None): _FLOAT}  # Nulls make an int column float (NaN)
+
+
+if __name__ == "__main__":
+    import sys
+    
+    # Usage: python json_csv.py [input.json] [output.csv]
+    input_file = sys.argv[1] if len(sys.argv) > 1 else 'input.json'
+    output_file = sys.argv[2] if len(sys.argv) > 2 else 'videos_with_timestamps.csv'
+    converter = JSONToCSVConverter(input_file)
+    converter.write(output_file, stream=True)  # Outputs a flattened CSV
@@ -0,0 +1,93 @@
+import gzip
+import json
+import re
+from typing import IO, Any, Iterator
+
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+
+
+def open_text(file_path: str) -> IO[str]:
+    """Open a UTF-8 text file for reading (BOM stripped), decompressing '.gz' files on the fly."""
+    if str(file_path).endswith('.gz'):
+        return gzip.open(file_path, 'rt', encoding='utf-8-sig')
+    return open(file_path, 'r', encoding='utf-8-sig')
+
+
+def is_jsonl(file_path: str) -> bool:
+    return str(file_path).endswith(('.jsonl', '.jsonl.gz'))
+
+
+def iter_json_records(file_path: str) -> Iterator[Any]:
+    """Stream records from a JSON array or a JSON Lines file (either optionally gzipped)."""
+    if not is_jsonl(file_path):
+        yield from iter_json_array(file_path)
+        return
+    with open_text(file_path) as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_number} of {file_path}: {e}") from e
+
+
+def iter_json_array(file_path: str, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Incrementally parse a top-level JSON array, yielding one element at a time.
+
+    Only the element being decoded plus one read chunk is held in memory, so multi-GB
+    exports can be processed with constant memory. A UTF-8 BOM is stripped.
+
+    Args:
+        file_path (str): Path to a file containing a JSON array (e.g. a list of video objects);
+            '.gz' files are decompressed on the fly.
+        chunk_size (int): Characters read per refill. Default is 1 MiB.
+
+    Raises:
+        ValueError: If the file is not a JSON array or is truncated/malformed.
+    """
+    decoder = json.JSONDecoder()
+    with open_text(file_path) as f:
+        buf, pos, eof = '', 0, False
+        state = 'start'  # start -> first -> value -> separator -> ... -> done
+
+        while state != 'done':
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos >= len(buf):
+                if eof:
+                    raise ValueError(f"Unexpected end of JSON array in {file_path}.")
+                chunk = f.read(chunk_size)
+                buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+                continue
+
+            if state == 'start':
+                if buf[pos] != '[':
+                    raise ValueError("JSON must be a list of video objects.")
+                pos += 1
+                state = 'first'
+            elif state == 'first' and buf[pos] == ']':
+                pos += 1
+                state = 'done'
+            elif state in ('first', 'value'):
+                try:
+                    element, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    if eof:
+                        raise ValueError(f"Invalid JSON in {file_path}: {e}") from e
+                    end = None
+                if end is None or (end == len(buf) and not eof):
+                    # Element may continue past the buffer: read more and decode again
+                    chunk = f.read(chunk_size)
+                    buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+                    continue
+                pos = end
+                state = 'separator'
+                yield element
+            elif buf[pos] == ',':
+                pos += 1
+                state = 'value'
+            elif buf[pos] == ']':
+                pos += 1
+                state = 'done'
+            else:
+                raise ValueError(f"Expected ',' or ']' in {file_path}, got {buf[pos]!r}.")
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+
+class LoadManifest:
+    """
+    Local record of each video's content hash and point count as last loaded into a collection.
+
+    Used by JSONToQdrantLoader.load_to_qdrant(incremental=True) to skip unchanged videos
+    and to find stale points when a transcript gets shorter or a video disappears.
+
+    File layout (JSON):
+    {
+      "collection": "youtube_videos",
+      "videos": {"VIDEO_ID": {"hash": "...", "points": 42}}
+    }
+    """
+
+    def __init__(self, path: str, collection_name: str):
+        """
+        Open the manifest at `path` (a missing file means nothing has been loaded yet).
+
+        Args:
+            path (str): Manifest file path.
+            collection_name (str): Collection the manifest describes.
+        """
+        self.path = path
+        self.collection_name = collection_name
+        self.videos: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('collection') == collection_name:
+                self.videos = manifest.get('videos', {})
+
+    @staticmethod
+    def video_hash(video: Dict[str, Any], settings: str = '') -> str:
+        """Content hash of a video dict plus the load settings that shape its points."""
+        canonical = json.dumps(video, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha1(f"{settings}\0{canonical}".encode('utf-8')).hexdigest()
+
+    def get(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """Manifest entry ({'hash', 'points'}) for a video, or None if it was never loaded."""
+        return self.videos.get(video_id)
+
+    def update(self, video_id: str, content_hash: str, points: int) -> None:
+        self.videos[video_id] = {'hash': content_hash, 'points': points}
+
+    def remove(self, video_id: str) -> None:
+        self.videos.pop(video_id, None)
+
+    def clear(self) -> None:
+        """Forget every video (e.g. after the collection was recreated)."""
+        self.videos = {}
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk."""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'collection': self.collection_name, 'videos': self.videos}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class LoadCheckpoint:
+    """
+    Batch-level progress of a running load, so an interrupted load can resume.
+
+    Records how many points (counted from the start of the load's point stream) Qdrant
+    has acknowledged, plus a fingerprint of the input file and load settings. A resumed
+    load with the same fingerprint skips straight past the acknowledged points.
+    """
+
+    def __init__(self, path: str, input_file: str, settings: str = ''):
+        """
+        Args:
+            path (str): Checkpoint file path.
+            input_file (str): File being loaded; fingerprinted to detect changes.
+            settings (str): Load settings that affect the point stream.
+        """
+        self.path = path
+        self.fingerprint = self.file_fingerprint(input_file, settings)
+        self._last_write = 0.0
+
+    @staticmethod
+    def file_fingerprint(file_path: str, settings: str = '', sample_bytes: int = 1 << 16) -> str:
+        """
+        Cheap fingerprint: size, mtime and hashes of the first and last sample_bytes of the file
+        (of every file, for a directory input such as a corpus).
+        """
+        if os.path.isdir(file_path):
+            digest = hashlib.sha1(settings.encode('utf-8'))
+            for name in sorted(os.listdir(file_path)):
+                digest.update(f"\0{name}\0".encode('utf-8'))
+                digest.update(LoadCheckpoint.file_fingerprint(os.path.join(file_path, name), '', sample_bytes).encode('ascii'))
+            return digest.hexdigest()
+        stat = os.stat(file_path)
+        digest = hashlib.sha1(f"{settings}\0{stat.st_size}\0{stat.st_mtime_ns}".encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            digest.update(f.read(sample_bytes))
+            if stat.st_size > sample_bytes:
+                f.seek(max(stat.st_size - sample_bytes, sample_bytes))
+                digest.update(f.read(sample_bytes))
+        return digest.hexdigest()
+
+    def acked_points(self) -> int:
+        """Points acknowledged by a previous run of the same load, or 0 if there is nothing to resume."""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('fingerprint') != self.fingerprint:
+            print(f"Checkpoint {self.path} is for a different input or settings; starting over.")
+            return 0
+        return state.get('acked_points', 0)
+
+    def save(self, acked_points: int, min_interval: float = 0.0) -> None:
+        """Atomically record the acknowledged point count (at most once per min_interval seconds)."""
+        now = time.monotonic()
+        if now - self._last_write < min_interval:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'acked_points': acked_points}, f)
+        os.replace(tmp_path, self.path)
+        self._last_write = now
+
+    def clear(self) -> None:
+        """Remove the checkpoint once the load has completed."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,80 +1,337 @@
+from __future__ import annotations
+
+import argparse
 import json
+import os
+import sys
+import threading
+import time
 import warnings
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Iterable, Iterator, Tuple
 from uuid import uuid5, NAMESPACE_DNS
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import (
-    PointStruct, VectorParams, Distance, Filter, FieldCondition, MatchValue
-)
-from sentence_transformers import SentenceTransformer  # Optional for embeddings
+from json_stream import iter_json_records, is_jsonl, open_text
+from load_manifest import LoadManifest, LoadCheckpoint
+from arabic_normalize import normalize_arabic
+from segment_chunker import SegmentChunker
+
+# qdrant_client, sentence_transformers (torch) and the numpy-backed modules are imported
+# where a code path first needs them, so payload-only commands start fast (see main()).
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+    from qdrant_client.http.models import Filter, PointStruct
+    from sentence_transformers import SentenceTransformer
+    from embedding_cache import EmbeddingCache
+    from embedding_pool import EmbeddingPool
+    from local_index import LocalVectorIndex
+    from bm25_index import BM25IndexBuilder, BM25Index
+    from query_encoder import QueryEncoder
 
 # Suppress PyTorch CUDA warnings for older GPUs
 warnings.filterwarnings("ignore", category=UserWarning, module="torch.cuda")
 
+# Video-level fields; with a normalized layout only SEGMENT_VIDEO_FIELDS stay on each segment point
+VIDEO_FIELDS = ('youtuber_id', 'video_title', 'video_url', 'video_id', 'publish_date', 'duration', 'content')
+SEGMENT_VIDEO_FIELDS = ('youtuber_id', 'video_id', 'publish_date')
+SEGMENT_FIELDS = ('ts_idx', 'start_time', 'end_time', 'text', 'text_normalized')
+# Extra segment fields of chunked loads: original timestamp indices and start times merged into the window
+WINDOW_FIELDS = ('seg_first', 'seg_last', 'seg_starts')
+VIDEO_META_SUFFIX = '_videos'  # Metadata collection name = collection name + suffix
+# Payload indexes created on every loaded collection, so filters don't scan every point
+PAYLOAD_INDEXES = {
+    'youtuber_id': 'keyword',
+    'video_id': 'keyword',
+    'start_time': 'float',
+    'publish_date': 'datetime'
+}  # PayloadSchemaType values
+
+
+class _SerializedClient:
+    """Forwards every method call of an in-process QdrantClient under one lock (its engine isn't thread-safe)."""
+    
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = threading.Lock()
+    
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
 class JSONToQdrantLoader:
     """
     Loads flattened video+timestamp data from JSON into Qdrant as points with JSON payloads.
     Optional: Adds text embeddings for semantic search. Handles large files with batch upserts.
+    
+    With backend='local', collections are instead built as memory-mapped LocalVectorIndex
+    directories under local_index_dir and queried in-process (no Qdrant server needed).
+    
+    Loads also write a BM25 keyword index per collection under bm25_dir (by default unless
+    streaming), which hybrid_search fuses with the vector results.
     """
     
-    def __init__(self, input_file: str):
+    def __init__(self, input_file: str, backend: str = 'qdrant', local_index_dir: str = 'local_index'):
+        if backend not in ('qdrant', 'local'):
+            raise ValueError("backend must be 'qdrant' or 'local'.")
         self.input_file = input_file
+        self.backend = backend
+        self.local_index_dir = local_index_dir
+        self.local_dtype = 'float32'  # Or 'float16' to halve local index size
+        self.bm25_dir = 'bm25_index'  # Keyword indexes: <bm25_dir>/<collection_name>
         self.data: List[Dict[str, Any]] = None
         self.client: Optional[QdrantClient] = None
         self.embedder: Optional[SentenceTransformer] = None
+        self.model_name = 'paraphrase-multilingual-MiniLM-L12-v2'
+        self.embedding_cache: Optional[EmbeddingCache] = None
         self.batch_size = 100  # For large files; adjust if needed
+        self.embed_batch_size = 64  # Distinct texts per encode() call
+        self.encode_workers = 1  # >1: loads encode in that many processes (EmbeddingPool), each holding the model
+        self.dedup_cache_size = 20000  # Recent distinct texts whose vectors are reused within a run
+        self.max_retries = 3  # Upsert retries per batch before giving up
+        self.retry_backoff = 0.5  # Seconds before the first retry; doubles on each attempt
+        self.metadata_store = 'inline'  # 'inline', 'collection' or 'sidecar' (see load_to_qdrant)
+        self.metadata_dir = 'video_metadata'  # Sidecar files: <metadata_dir>/<collection_name>.json
+        self.chunker: Optional[SegmentChunker] = None  # Merge timestamps into windows before loading
+        self.video_meta_cache_size = 10000  # Video metadata entries kept for query-time joins
+        self.video_cache_size = 64  # Rebuilt videos kept by get_full_video
+        self.query_cache_size = 4096  # Query vectors kept by the query encoder (LRU)
+        self.query_batch_wait = 0.002  # Seconds a query waits to share an encode() call with concurrent ones
+        self.retrieve_batch_size = 256  # Point IDs per video in the first retrieve() round
+        self._text_vectors: OrderedDict = OrderedDict()
+        self._encoded_texts = 0
+        self._video_meta_buffer: List[Dict[str, Any]] = []
+        self._video_meta_cache: OrderedDict = OrderedDict()
+        self._sidecars: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._video_cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()  # Guards the caches above; searches update them from many threads
+        self._local_indexes: Dict[str, LocalVectorIndex] = {}
+        self._bm25_indexes: Dict[str, BM25Index] = {}
+        self._encode_pool: Optional[EmbeddingPool] = None  # Only alive during a load with encode_workers > 1
+        self._query_encoder: Optional[QueryEncoder] = None
+        self._query_encoder_lock = threading.Lock()  # Searches may arrive from many threads at once
+        self._search_latencies: Dict[str, deque] = {'semantic': deque(maxlen=10000), 'hybrid': deque(maxlen=10000)}
     
-    def read(self) -> List[Dict[str, Any]]:
-        """Read JSON into list of video dicts (stream for large files)."""
-        with open(self.input_file, 'r', encoding='utf-8-sig') as f:  # FIXED: -sig strips BOM
-            self.data = json.load(f)
+    def read(self, compact: bool = False) -> List[Dict[str, Any]]:
+        """
+        Read JSON (or JSON Lines; optionally gzipped) into list of video dicts (stream for large files).
+        A '.corpus' directory is opened memory-mapped instead (a sequence of video dicts decoded on access).
+        
+        Args:
+            compact (bool): Parse the file incrementally into a SegmentStore (a sequence of video dicts
+                built on access from array columns) instead of a list of dicts; several times smaller
+                in memory. Default is False.
+        """
+        from corpus import Corpus, is_corpus, iter_videos
+
+        if is_corpus(self.input_file):
+            self.data = Corpus(self.input_file)
+            print(f"Opened corpus with {len(self.data)} videos from {self.input_file}.")
+            return self.data
+        if compact:
+            from segment_store import SegmentStore
+            self.data = SegmentStore.from_videos(iter_videos(self.input_file))
+            print(f"Loaded {len(self.data)} videos ({len(self.data.start_times)} segments, compact) from {self.input_file}.")
+            return self.data
+        if is_jsonl(self.input_file):
+            self.data = list(iter_json_records(self.input_file))
+        else:
+            with open_text(self.input_file) as f:  # FIXED: -sig strips BOM
+                self.data = json.load(f)
         if not isinstance(self.data, list):
             raise ValueError("JSON must be a list of video objects.")
         print(f"Loaded {len(self.data)} videos from {self.input_file}.")
         return self.data
     
-    def _init_client(self, host: str = 'localhost', port: int = 6333):
-        """Initialize Qdrant client."""
+    def _init_client(self, host: str = 'localhost', port: int = 6333, location: Optional[str] = None):
+        """
+        Initialize Qdrant client (location=':memory:' runs an in-process Qdrant for tests).
+        
+        The in-process engine isn't thread-safe, so every call to it (upserts and queries) is
+        serialized: upload_workers then only overlap embedding with uploads, a ':memory:' load
+        doesn't measure upload concurrency, and concurrent searches take turns.
+        """
         if self.client is None:
-            self.client = QdrantClient(host=host, port=port)
+            from qdrant_client import QdrantClient
+            if location:
+                self.client = _SerializedClient(QdrantClient(location=location))  # The in-process engine isn't thread-safe
+            else:
+                self.client = QdrantClient(host=host, port=port)
     
-    def _init_embedder(self, model_name: str = 'paraphrase-multilingual-MiniLM-L12-v2'):
-        """Optional: Load embedding model on CPU (multilingual for Arabic)."""
+    def _init_embedder(self, model_name: Optional[str] = None):
+        """Optional: Load embedding model on CPU (multilingual for Arabic); used for queries and single-process loads."""
         if self.embedder is None:
-            self.embedder = SentenceTransformer(model_name, device='cpu')
+            from sentence_transformers import SentenceTransformer
+            self.embedder = SentenceTransformer(model_name or self.model_name, device='cpu')
+    
+    def _load_encoder(self):
+        """Encoder for loading: an EmbeddingPool while encode_workers > 1 (started on first use), else the model."""
+        if self.encode_workers > 1:
+            if self._encode_pool is None:
+                from embedding_pool import EmbeddingPool
+                self._encode_pool = EmbeddingPool(self.model_name, self.encode_workers, self.embed_batch_size)
+            return self._encode_pool
+        self._init_embedder()
+        return self.embedder
+    
+    def _close_encode_pool(self) -> None:
+        """Report per-worker throughput and stop the encode pool, if the load started one."""
+        if self._encode_pool is None:
+            return
+        pool, self._encode_pool = self._encode_pool, None
+        stats = pool.stats()
+        print(f"Encode pool: {stats['texts']} texts on {stats['workers']} workers "
+              f"({stats['texts_per_sec']:.0f} texts/sec)")
+        for worker in stats['per_worker']:
+            print(f"  worker {worker['pid']}: {worker['texts']} texts, {worker['texts_per_sec']:.0f} texts/sec")
+        pool.close()
+    
+    def _embedding_dim(self) -> int:
+        """Vector size, taken from the embedding cache when possible so the model isn't loaded."""
+        loaded = self.embedder is not None or self._encode_pool is not None
+        if not loaded and self.embedding_cache is not None and self.embedding_cache.dim:
+            return self.embedding_cache.dim
+        encoder = self._encode_pool if self._encode_pool is not None else self.embedder
+        if encoder is None:
+            encoder = self._load_encoder()
+        return encoder.get_sentence_embedding_dimension()
     
     def load_to_qdrant(
         self, 
         collection_name: str = 'videos',
         embed_text: bool = False,
         host: str = 'localhost',
-        port: int = 6333
+        port: int = 6333,
+        cache_dir: Optional[str] = None,
+        stream: bool = False,
+        location: Optional[str] = None,
+        upload_workers: int = 2,
+        max_in_flight: int = 4,
+        wait: bool = True,
+        incremental: bool = False,
+        manifest_path: Optional[str] = None,
+        prune_missing: bool = False,
+        resume: bool = False,
+        checkpoint_path: Optional[str] = None,
+        metadata_store: Optional[str] = None,
+        keyword_index: Optional[bool] = None,
+        chunker: Optional[SegmentChunker] = None,
+        encode_workers: Optional[int] = None
     ) -> None:
         """
         Flatten data and upsert to Qdrant collection in batches.
         
+        The calling thread flattens and embeds while a pool of upload_workers threads
+        sends finished batches, with at most max_in_flight batches queued or uploading.
+        Memory therefore stays around max_in_flight batches of points.
+        
         Args:
             collection_name: Name of the Qdrant collection.
             embed_text: If True, embed 'text' field as vectors (requires sentence-transformers).
             host/port: Qdrant server details.
+            cache_dir: Optional embedding cache directory; cached texts skip the model entirely.
+            stream: If True, parse videos incrementally from input_file instead of using read().
+            location: Optional QdrantClient location (e.g. ':memory:') used instead of host/port. Calls
+                to such an in-process client are serialized, so use a server to benchmark upload_workers.
+            upload_workers: Concurrent upsert threads.
+            max_in_flight: Maximum batches submitted but not yet acknowledged.
+            wait: If False, don't wait for Qdrant to apply each upsert before acknowledging it.
+            incremental: If True, only embed and upsert videos whose content changed since the
+                last incremental load (tracked in a local manifest), and delete their orphaned points.
+            manifest_path: Manifest file; defaults to '<input_file>.<collection_name>.manifest.json'.
+            prune_missing: With incremental, also delete points and video metadata of videos no longer in the input.
+            resume: If True, continue an interrupted load from its checkpoint, skipping points
+                Qdrant already acknowledged without re-flattening or re-embedding them.
+            checkpoint_path: Checkpoint file; defaults to '<input_file>.<collection_name>.checkpoint.json'.
+                It is updated as batches are acknowledged and removed when the load completes.
+            metadata_store: Where video-level metadata (title, URL, description...) lives:
+                'inline' copies it onto every segment point (default); 'collection' stores it once
+                per video in '<collection_name>_videos'; 'sidecar' writes it to a local JSON file
+                in metadata_dir. With 'collection'/'sidecar', segment points only keep youtuber_id
+                and video_id, and query methods join the metadata back in.
+            keyword_index: If True, also build the collection's BM25 index for hybrid_search from
+                every video in the input (including unchanged or resumed ones), merged into the
+                index of earlier loads into the same Qdrant collection. Its postings are held in
+                memory until the load ends, so the default is True only without stream.
+            chunker: Optional SegmentChunker; each point is then a window of consecutive
+                timestamps (ts_idx numbers the windows) with seg_first/seg_last/seg_starts
+                pointing back to the original captions.
+            encode_workers: Encode with this many worker processes instead of one in-process
+                model (e.g. os.cpu_count() on ingest machines). The pool only lives for this load (it
+                is shut down even if the load fails); queries always use one in-process model.
         """
-        if self.data is None:
-            raise ValueError("Call read() first.")
+        if self.data is None and not stream:
+            raise ValueError("Call read() first (or pass stream=True).")
+        if metadata_store is not None:
+            self.metadata_store = metadata_store
+        if chunker is not None:
+            self.chunker = chunker
+        if encode_workers is not None:
+            self.encode_workers = encode_workers
+        if keyword_index is None:
+            keyword_index = not stream
+        if self.metadata_store not in ('inline', 'collection', 'sidecar'):
+            raise ValueError("metadata_store must be 'inline', 'collection' or 'sidecar'.")
+        
+        if embed_text and cache_dir and self.embedding_cache is None:
+            from embedding_cache import EmbeddingCache
+            self.embedding_cache = EmbeddingCache(cache_dir, self.model_name)
         
-        self._init_client(host, port)
+        try:
+            if self.backend == 'local':
+                if incremental or resume or self.metadata_store != 'inline':
+                    raise ValueError("The local backend rebuilds its index in full; use the defaults for "
+                                     "incremental, resume and metadata_store.")
+                self._load_local(collection_name, embed_text, stream, keyword_index)
+            else:
+                self._load_qdrant(
+                    collection_name, embed_text, host, port, stream, location, upload_workers, max_in_flight,
+                    wait, incremental, manifest_path, prune_missing, resume, checkpoint_path, keyword_index
+                )
+        finally:
+            self._close_encode_pool()  # Also when the load fails, so no worker processes are left running
+    
+    def _load_qdrant(
+        self,
+        collection_name: str,
+        embed_text: bool,
+        host: str,
+        port: int,
+        stream: bool,
+        location: Optional[str],
+        upload_workers: int,
+        max_in_flight: int,
+        wait: bool,
+        incremental: bool,
+        manifest_path: Optional[str],
+        prune_missing: bool,
+        resume: bool,
+        checkpoint_path: Optional[str],
+        keyword_index: bool
+    ) -> None:
+        """Upsert the input to a Qdrant collection (see load_to_qdrant)."""
+        self._init_client(host, port, location)
         
         # Test connection
         try:
             self.client.get_collections()  # Quick health check
         except Exception as e:
-            raise ConnectionError(f"Failed to connect to Qdrant at {host}:{port}. Is the Docker container running? Error: {e}")
+            raise ConnectionError(f"Failed to connect to Qdrant at {location or f'{host}:{port}'}. Is the Docker container running? Error: {e}")
+        
+        from qdrant_client.http.models import VectorParams, Distance
         
         # Create collection only if it doesn't exist (or recreate if vectors needed)
+        created = True
         try:
             if not self.client.collection_exists(collection_name):
                 if embed_text:
-                    self._init_embedder()
-                    vector_size = self.embedder.get_sentence_embedding_dimension()  # e.g., 384
+                    vector_size = self._embedding_dim()  # e.g., 384
                     self.client.create_collection(
                         collection_name=collection_name,
                         vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
@@ -84,16 +341,14 @@ class JSONToQdrantLoader:
                     self.client.create_collection(collection_name=collection_name)
                     print(f"Created new collection '{collection_name}' (payload-only).")
             else:
+                created = False
                 print(f"Collection '{collection_name}' already exists—skipping creation.")
-                if embed_text:
-                    self._init_embedder()  # Still init for encoding
         except Exception as e:
             print(f"Collection creation failed: {e}. Trying to delete and recreate...")
             self.client.delete_collection(collection_name)
             # Recreate
             if embed_text:
-                self._init_embedder()
-                vector_size = self.embedder.get_sentence_embedding_dimension()
+                vector_size = self._embedding_dim()
                 self.client.create_collection(
                     collection_name=collection_name,
                     vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
@@ -102,12 +357,449 @@ class JSONToQdrantLoader:
                 self.client.create_collection(collection_name=collection_name)
             print(f"Recreated collection '{collection_name}'.")
         
-        # Flatten and batch upsert
-        all_points = []
-        for video_idx, video in enumerate(self.data):
-            if video_idx % 10 == 0:  # Progress tick more frequent for 95 videos
-                print(f"Processing video {video_idx + 1}/95...")
-            
+        self._ensure_payload_indexes(collection_name)
+        if isinstance(self.client, _SerializedClient) and upload_workers > 1:
+            print(f"In-process client: calls are serialized, so the {upload_workers} upload workers don't run concurrently.")
+        
+        videos = self._iter_videos(stream)
+        keywords = self._keyword_builder() if keyword_index else None
+        if keywords is not None:
+            videos = self._iter_keyword_indexed(videos, keywords)
+        total_videos = None if stream else len(self.data)
+        manifest = sync = None
+        if incremental:
+            manifest = LoadManifest(
+                manifest_path or f"{self.input_file}.{collection_name}.manifest.json", collection_name
+            )
+            if created:
+                manifest.clear()  # A new collection holds none of the manifest's points
+            sync = {'updates': {}, 'stale': [], 'seen': set(), 'unchanged': 0}
+            videos = self._iter_changed_videos(videos, manifest, self._load_settings(embed_text), sync)
+        
+        checkpoint = LoadCheckpoint(
+            checkpoint_path or f"{self.input_file}.{collection_name}.checkpoint.json",
+            self.input_file,
+            f"{self._load_settings(embed_text)}|incremental={incremental}"
+        )
+        skip_points = checkpoint.acked_points() if resume else 0
+        if skip_points:
+            print(f"Resuming: skipping {skip_points} points already acknowledged.")
+        
+        # Flatten and embed here; upload workers send batches concurrently
+        self._text_vectors = OrderedDict()
+        self._encoded_texts = 0
+        self._video_meta_buffer = []
+        with self._cache_lock:
+            self._video_meta_cache.clear()
+            self._video_cache.clear()
+        total_points = 0
+        started = time.perf_counter()
+        in_flight = threading.BoundedSemaphore(max_in_flight)
+        uploads = deque()
+        point_batches = self._iter_point_batches(videos, embed_text, total_videos, skip_points)
+        with ThreadPoolExecutor(max_workers=upload_workers, thread_name_prefix='upsert') as pool:
+            try:
+                for batch_num, batch in enumerate(point_batches, start=1):
+                    in_flight.acquire()
+                    future = pool.submit(self._upsert_batch, collection_name, batch, wait)
+                    future.add_done_callback(lambda _: in_flight.release())
+                    uploads.append((batch_num, future))
+                    if self.metadata_store == 'collection' and len(self._video_meta_buffer) >= self.batch_size:
+                        self._flush_video_meta(collection_name)
+                    # Batches are acknowledged in submission order, so total_points is a safe resume offset
+                    while uploads and uploads[0][1].done():
+                        total_points += self._finish_upload(*uploads.popleft())
+                        checkpoint.save(skip_points + total_points, min_interval=1.0)
+                while uploads:
+                    total_points += self._finish_upload(*uploads.popleft())
+                    checkpoint.save(skip_points + total_points, min_interval=1.0)
+                self._flush_video_meta(collection_name)
+            except BaseException:
+                for _, future in uploads:
+                    future.cancel()
+                checkpoint.save(skip_points + total_points)
+                print(f"Load interrupted after {skip_points + total_points} acknowledged points; "
+                      f"rerun with resume=True to continue.")
+                raise
+        
+        removed_videos = []
+        if manifest is not None:
+            removed_videos = self._finish_sync(collection_name, manifest, sync, prune_missing, wait)
+        checkpoint.clear()
+        if keywords is not None:
+            # Merge with earlier loads (e.g. other shards); a new collection starts a new index
+            self._write_keyword_index(collection_name, keywords, merge=not created, drop_video_ids=removed_videos)
+        
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self._close_encode_pool()
+        if embed_text and self.embedding_cache is not None:
+            self.embedding_cache.flush()
+            print(f"Embedding cache: {self.embedding_cache.stats()}")
+        print(f"Loaded {total_points} points to '{collection_name}' (vectors: {embed_text}) in {elapsed:.1f}s "
+              f"({total_points / elapsed:.0f} segments/sec, {self._encoded_texts} texts encoded)")
+    
+    def _load_local(self, collection_name: str, embed_text: bool, stream: bool = False, keyword_index: bool = False) -> None:
+        """Build a LocalVectorIndex for the collection instead of upserting to Qdrant."""
+        from local_index import LocalIndexWriter
+        self._text_vectors = OrderedDict()
+        self._encoded_texts = 0
+        started = time.perf_counter()
+        path = self._local_index_path(collection_name)
+        writer = LocalIndexWriter(path, dtype=self.local_dtype, windows=self.chunker is not None)
+        total_videos = None if stream else len(self.data)
+        videos = self._iter_videos(stream)
+        keywords = self._keyword_builder() if keyword_index else None
+        if keywords is not None:
+            videos = self._iter_keyword_indexed(videos, keywords)
+        for batch in self._iter_point_batches(videos, embed_text, total_videos):
+            writer.add([point.payload for point in batch], [point.vector for point in batch] if embed_text else None)
+        writer.close()
+        if keywords is not None:
+            self._write_keyword_index(collection_name, keywords)
+        self._local_indexes.pop(collection_name, None)
+        with self._cache_lock:
+            self._video_cache.clear()
+        
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self._close_encode_pool()
+        if embed_text and self.embedding_cache is not None:
+            self.embedding_cache.flush()
+        print(f"Wrote {writer.count} segments to local index {path} (vectors: {embed_text}) in {elapsed:.1f}s "
+              f"({writer.count / elapsed:.0f} segments/sec, {self._encoded_texts} texts encoded)")
+    
+    def _local_index_path(self, collection_name: str) -> str:
+        return os.path.join(self.local_index_dir, collection_name)
+    
+    def _local_index(self, collection_name: str) -> LocalVectorIndex:
+        """Open (once) the memory-mapped local index for a collection."""
+        if collection_name not in self._local_indexes:
+            from local_index import LocalVectorIndex
+            self._local_indexes[collection_name] = LocalVectorIndex(self._local_index_path(collection_name))
+        return self._local_indexes[collection_name]
+    
+    def _ensure_payload_indexes(self, collection_name: str) -> None:
+        """Create the PAYLOAD_INDEXES that the collection doesn't have yet."""
+        existing = self.client.get_collection(collection_name).payload_schema or {}
+        from qdrant_client.http.models import PayloadSchemaType
+        for field_name, schema in PAYLOAD_INDEXES.items():
+            if field_name not in existing:
+                self.client.create_payload_index(
+                    collection_name=collection_name, field_name=field_name, field_schema=PayloadSchemaType(schema)
+                )
+                print(f"Created {schema} payload index on '{field_name}'.")
+    
+    def _upsert_batch(self, collection_name: str, points: List[PointStruct], wait: bool = True) -> int:
+        """Upsert one batch, retrying with exponential backoff. Returns the number of points sent."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.client.upsert(collection_name=collection_name, points=points, wait=wait)
+                return len(points)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_backoff * 2 ** attempt
+                print(f"Upsert failed ({e}); retrying in {delay:.1f}s...")
+                time.sleep(delay)
+    
+    def _finish_upload(self, batch_num: int, future) -> int:
+        """Wait for an upload future, re-raising its error, and report the batch."""
+        count = future.result()
+        print(f"Upserted batch {batch_num} ({count} points)")
+        return count
+    
+    def _flush_video_meta(self, collection_name: str) -> None:
+        """Write buffered video-level metadata to the metadata collection or sidecar file."""
+        metas, self._video_meta_buffer = self._video_meta_buffer, []
+        if not metas or self.metadata_store == 'inline':
+            return
+        
+        if self.metadata_store == 'collection':
+            meta_collection = collection_name + VIDEO_META_SUFFIX
+            if not self.client.collection_exists(meta_collection):
+                self.client.create_collection(collection_name=meta_collection)
+            from qdrant_client.http.models import PointStruct
+            points = [PointStruct(id=self._video_meta_id(meta['video_id']), payload=meta, vector={}) for meta in metas]
+            for i in range(0, len(points), self.batch_size):
+                self._upsert_batch(meta_collection, points[i:i + self.batch_size])
+            return
+        
+        sidecar = self._read_sidecar(collection_name)
+        sidecar.update((meta['video_id'], meta) for meta in metas)
+        self._write_sidecar(collection_name, sidecar)
+    
+    def _delete_video_meta(self, collection_name: str, video_ids: List[str], wait: bool) -> None:
+        """Drop removed videos from the metadata collection or sidecar file and from the caches."""
+        with self._cache_lock:
+            for video_id in video_ids:
+                self._video_meta_cache.pop((collection_name, video_id), None)
+                self._video_cache.pop((collection_name, video_id), None)
+        if not video_ids or self.metadata_store == 'inline':
+            return
+        
+        if self.metadata_store == 'collection':
+            meta_collection = collection_name + VIDEO_META_SUFFIX
+            if not self.client.collection_exists(meta_collection):
+                return
+            from qdrant_client.http.models import PointIdsList
+            ids = [self._video_meta_id(video_id) for video_id in video_ids]
+            delete_batch = self.batch_size * 10
+            for i in range(0, len(ids), delete_batch):
+                self.client.delete(
+                    collection_name=meta_collection,
+                    points_selector=PointIdsList(points=ids[i:i + delete_batch]),
+                    wait=wait
+                )
+            return
+        
+        sidecar = self._read_sidecar(collection_name)
+        if any([sidecar.pop(video_id, None) is not None for video_id in video_ids]):
+            self._write_sidecar(collection_name, sidecar)
+    
+    @staticmethod
+    def _video_meta_id(video_id: str) -> str:
+        """Point ID of a video's entry in the metadata collection."""
+        return str(uuid5(NAMESPACE_DNS, video_id))
+    
+    def _sidecar_path(self, collection_name: str) -> str:
+        return os.path.join(self.metadata_dir, f"{collection_name}.json")
+    
+    def _write_sidecar(self, collection_name: str, sidecar: Dict[str, Dict[str, Any]]) -> None:
+        path = self._sidecar_path(collection_name)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(sidecar, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+    
+    def _read_sidecar(self, collection_name: str) -> Dict[str, Dict[str, Any]]:
+        """Video metadata sidecar for a collection (empty if none was written), loaded once."""
+        with self._cache_lock:
+            if collection_name not in self._sidecars:
+                path = self._sidecar_path(collection_name)
+                sidecar = {}
+                if os.path.exists(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        sidecar = json.load(f)
+                self._sidecars[collection_name] = sidecar
+            return self._sidecars[collection_name]
+    
+    def _get_video_meta(self, collection_name: str, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Video-level metadata for video_ids from the sidecar or metadata collection, via an LRU cache."""
+        found = {}
+        missing = []
+        with self._cache_lock:
+            for video_id in dict.fromkeys(video_ids):
+                meta = self._video_meta_cache.get((collection_name, video_id))
+                if meta is None:
+                    missing.append(video_id)
+                else:
+                    self._video_meta_cache.move_to_end((collection_name, video_id))
+                    found[video_id] = meta
+        
+        if missing:
+            sidecar = self._read_sidecar(collection_name)
+            meta_collection = collection_name + VIDEO_META_SUFFIX
+            if sidecar:
+                fetched = {video_id: sidecar[video_id] for video_id in missing if video_id in sidecar}
+            elif self.client is not None and self.client.collection_exists(meta_collection):
+                records = self.client.retrieve(
+                    collection_name=meta_collection,
+                    ids=[self._video_meta_id(video_id) for video_id in missing],
+                    with_payload=True
+                )
+                fetched = {record.payload['video_id']: record.payload for record in records}
+            else:
+                fetched = {}
+            found.update(fetched)
+            with self._cache_lock:
+                for video_id, meta in fetched.items():
+                    self._video_meta_cache[(collection_name, video_id)] = meta
+                while len(self._video_meta_cache) > self.video_meta_cache_size:
+                    self._video_meta_cache.popitem(last=False)
+        return found
+    
+    def _join_video_meta(self, collection_name: str, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fill video-level fields back into segment payloads stored with a normalized layout."""
+        normalized = [payload for payload in payloads if 'video_title' not in payload and payload.get('video_id')]
+        if not normalized:
+            return payloads
+        metas = self._get_video_meta(collection_name, [payload['video_id'] for payload in normalized])
+        for payload in normalized:
+            meta = metas.get(payload['video_id'])
+            if meta:
+                for key, value in meta.items():
+                    payload.setdefault(key, value)
+        return payloads
+    
+    @staticmethod
+    def _keyword_builder() -> BM25IndexBuilder:
+        from bm25_index import BM25IndexBuilder
+        return BM25IndexBuilder()
+    
+    @staticmethod
+    def _iter_keyword_indexed(videos: Iterator[Dict[str, Any]], keywords: BM25IndexBuilder) -> Iterator[Dict[str, Any]]:
+        """Pass videos through unchanged, adding each one to the BM25 index builder."""
+        for video in videos:
+            keywords.add_video(video)
+            yield video
+    
+    def _write_keyword_index(
+        self, collection_name: str, keywords: BM25IndexBuilder, merge: bool = False, drop_video_ids: Iterable[str] = ()
+    ) -> None:
+        path = os.path.join(self.bm25_dir, collection_name)
+        segments = keywords.write(path, merge=merge, drop_video_ids=drop_video_ids)
+        self._bm25_indexes.pop(collection_name, None)
+        print(f"Wrote BM25 index for {segments} segments to {path} "
+              f"({len(keywords.lengths)} from this load, {keywords.term_count} terms)")
+    
+    def _bm25_index(self, collection_name: str) -> BM25Index:
+        """
+        Open (once) the BM25 keyword index written by the collection's last load.
+        
+        Raises:
+            FileNotFoundError: If there is no index for the collection under bm25_dir.
+        """
+        if collection_name not in self._bm25_indexes:
+            from bm25_index import BM25Index
+            path = os.path.join(self.bm25_dir, collection_name)
+            if not os.path.exists(os.path.join(path, 'meta.json')):
+                raise FileNotFoundError(
+                    f"No keyword index for collection '{collection_name}' in {path}; load it with keyword_index=True "
+                    f"or point bm25_dir at the directory its load wrote to."
+                )
+            self._bm25_indexes[collection_name] = BM25Index(path)
+        return self._bm25_indexes[collection_name]
+    
+    def _iter_videos(self, stream: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Yield video dicts from read() data, or parse them one by one from input_file when streaming.
+        With a chunker, each video's timestamps are already merged into windows.
+        """
+        from corpus import iter_videos
+
+        videos = iter_videos(self.input_file) if stream else iter(self.data)
+        if self.chunker is not None:
+            return map(self.chunker.chunk_video, videos)
+        return videos
+    
+    def _load_settings(self, embed_text: bool) -> str:
+        """Load options that change point contents; part of every manifest hash."""
+        return json.dumps(
+            {
+                'embed': self.model_name if embed_text else None,
+                'metadata_store': self.metadata_store,
+                'chunking': self.chunker.settings() if self.chunker is not None else None,
+                'payload_version': 4  # Bump when segment payload fields change
+            },
+            sort_keys=True
+        )
+    
+    @staticmethod
+    def _point_id(video_id: str, ts_idx: int) -> str:
+        """Deterministic point ID of a video's ts_idx-th segment."""
+        return str(uuid5(NAMESPACE_DNS, f"{video_id}_{ts_idx}"))
+    
+    @staticmethod
+    def _video_point_count(video: Dict[str, Any]) -> int:
+        """Number of points a video is flattened into (videos without timestamps still get one)."""
+        return max(len(video.get('timestamps', [])), 1)
+    
+    def _iter_changed_videos(
+        self, videos: Iterator[Dict[str, Any]], manifest: LoadManifest, settings: str, sync: Dict[str, Any]
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield only videos whose content hash differs from the manifest, collecting orphaned point IDs."""
+        for video in videos:
+            video_id = video.get('video_id', '')
+            sync['seen'].add(video_id)
+            content_hash = LoadManifest.video_hash(video, settings)
+            entry = manifest.get(video_id)
+            if entry and entry['hash'] == content_hash:
+                sync['unchanged'] += 1
+                continue
+            points = self._video_point_count(video)
+            if entry and entry['points'] > points:
+                sync['stale'].extend(self._point_id(video_id, i) for i in range(points, entry['points']))
+            sync['updates'][video_id] = (content_hash, points)
+            yield video
+    
+    def _finish_sync(
+        self, collection_name: str, manifest: LoadManifest, sync: Dict[str, Any], prune_missing: bool, wait: bool
+    ) -> List[str]:
+        """
+        Delete orphaned points and removed videos' metadata, then record the uploaded videos in the manifest.
+        
+        Returns:
+            List[str]: IDs of the videos removed because they are no longer in the input.
+        """
+        stale = sync['stale']
+        removed_videos = []
+        if prune_missing:
+            removed_videos = [video_id for video_id in manifest.videos if video_id not in sync['seen']]
+            for video_id in removed_videos:
+                stale.extend(self._point_id(video_id, i) for i in range(manifest.get(video_id)['points']))
+        
+        from qdrant_client.http.models import PointIdsList
+        delete_batch = self.batch_size * 10
+        for i in range(0, len(stale), delete_batch):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=stale[i:i + delete_batch]),
+                wait=wait
+            )
+        
+        self._delete_video_meta(collection_name, removed_videos, wait)
+        
+        for video_id in removed_videos:
+            manifest.remove(video_id)
+        for video_id, (content_hash, points) in sync['updates'].items():
+            manifest.update(video_id, content_hash, points)
+        manifest.save()
+        print(f"Incremental sync: {len(sync['updates'])} changed, {sync['unchanged']} unchanged, "
+              f"{len(removed_videos)} removed videos; deleted {len(stale)} stale points.")
+        return removed_videos
+    
+    def _iter_point_batches(
+        self,
+        videos: Iterator[Dict[str, Any]],
+        embed_text: bool,
+        total_videos: Optional[int] = None,
+        skip_points: int = 0
+    ) -> Iterator[List[PointStruct]]:
+        """
+        Flatten, embed and yield PointStructs in batches of batch_size.
+        
+        Each encode() call gets up to embed_batch_size distinct texts per encode worker; at
+        most about one upsert batch of points (or one encode call's worth) is buffered at any time.
+        """
+        encode_size = self.embed_batch_size * max(self.encode_workers, 1)
+        pending_size = max(self.batch_size, encode_size)
+        pending: List[Tuple[str, Dict[str, Any]]] = []
+        new_texts = set()
+        ready: List[PointStruct] = []
+        for point_id, payload in self._iter_segments(videos, total_videos, skip_points):
+            pending.append((point_id, payload))
+            if embed_text and payload['text'] and payload['text'] not in self._text_vectors:
+                new_texts.add(payload['text'])
+            if len(new_texts) >= encode_size or len(pending) >= pending_size:
+                ready.extend(self._build_points(pending, embed_text))
+                pending, new_texts = [], set()
+                while len(ready) >= self.batch_size:
+                    yield ready[:self.batch_size]
+                    ready = ready[self.batch_size:]
+        if pending:
+            ready.extend(self._build_points(pending, embed_text))
+        for i in range(0, len(ready), self.batch_size):
+            yield ready[i:i + self.batch_size]
+    
+    def _iter_segments(
+        self, videos: Iterator[Dict[str, Any]], total_videos: Optional[int] = None, skip_points: int = 0
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Flatten videos into (point_id, payload) pairs, one per timestamp segment.
+        
+        The first skip_points points are skipped by counting timestamps only, without
+        building their payloads (used when resuming from a checkpoint).
+        """
+        for video_idx, video in enumerate(videos):
             video_base = {
                 'youtuber_id': video.get('youtuber_id', ''),
                 'video_title': video.get('video_title', ''),
@@ -117,40 +809,106 @@ class JSONToQdrantLoader:
                 'duration': video.get('duration', ''),
                 'content': video.get('content', '')  # Preserve description field
             }
+            if self.metadata_store != 'inline':
+                # Normalized layout: metadata is stored once per video, segments keep only the join keys
+                self._video_meta_buffer.append(video_base)
+                video_base = {key: video_base[key] for key in SEGMENT_VIDEO_FIELDS}
+            
+            first_idx = 0
+            if skip_points:
+                point_count = self._video_point_count(video)
+                if skip_points >= point_count:
+                    skip_points -= point_count
+                    continue
+                first_idx, skip_points = skip_points, 0
+            
+            if video_idx % 10 == 0:
+                print(f"Processing video {video_idx + 1}/{total_videos or '?'}...")
             
             timestamps = video.get('timestamps', [])
             if not timestamps:
                 # No timestamps: single point with empty fields
-                point_key = f"{video_base['video_id']}_0"
-                point_id = str(uuid5(NAMESPACE_DNS, point_key))
-                payload = {**video_base, 'start_time': 0, 'end_time': 0, 'text': ''}
-                vector = None
-                if embed_text:
-                    vector = [0.0] * self.embedder.get_sentence_embedding_dimension()  # Dummy
-                all_points.append(PointStruct(id=point_id, payload=payload, vector=vector))
-            else:
-                for ts_idx, ts in enumerate(timestamps):
-                    point_key = f"{video_base['video_id']}_{ts_idx}"
-                    point_id = str(uuid5(NAMESPACE_DNS, point_key))
-                    payload = {
-                        **video_base,
-                        'start_time': ts.get('start_time', 0),
-                        'end_time': ts.get('end_time', 0),
-                        'text': ts.get('text', '')
-                    }
-                    vector = None
-                    if embed_text and payload['text']:
-                        vector = self.embedder.encode(payload['text']).tolist()
-                    all_points.append(PointStruct(id=point_id, payload=payload, vector=vector))
-        
-        # Batch upsert for large files
-        total_points = len(all_points)
-        for i in range(0, total_points, self.batch_size):
-            batch = all_points[i:i + self.batch_size]
-            self.client.upsert(collection_name=collection_name, points=batch)
-            print(f"Upserted batch {i // self.batch_size + 1} ({len(batch)} points)")
-        
-        print(f"Loaded {total_points} points to '{collection_name}' (vectors: {embed_text})")
+                yield self._point_id(video_base['video_id'], 0), {
+                    **video_base, 'ts_idx': 0, 'start_time': 0, 'end_time': 0, 'text': '', 'text_normalized': ''
+                }
+                continue
+            
+            for ts_idx in range(first_idx, len(timestamps)):
+                ts = timestamps[ts_idx]
+                text = ts.get('text', '')
+                payload = {
+                    **video_base,
+                    'ts_idx': ts_idx,  # Position in the video; neighbours are ts_idx +/- k (see get_context)
+                    'start_time': ts.get('start_time', 0),
+                    'end_time': ts.get('end_time', 0),
+                    'text': text,
+                    # Converters already store it; older exports are normalized here (cached per text)
+                    'text_normalized': ts.get('text_normalized') or normalize_arabic(text)
+                }
+                if 'seg_first' in ts:
+                    payload.update((key, ts[key]) for key in WINDOW_FIELDS)
+                yield self._point_id(video_base['video_id'], ts_idx), payload
+    
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Encode texts, calling the model once per embed_batch_size distinct texts (times
+        encode_workers, so every worker of a pool gets a shard).
+        
+        Texts already encoded earlier in the run reuse their vector, and empty texts
+        get a zero vector, so repeated fillers like "[موسيقى]" are encoded only once.
+        With an embedding cache, cached texts are served from disk and the model is only
+        loaded if something is actually missing.
+        """
+        fresh = {}
+        to_encode = []
+        for text in texts:
+            if text and text not in self._text_vectors and text not in fresh:
+                fresh[text] = None
+                to_encode.append(text)
+        
+        if self.embedding_cache is not None and to_encode:
+            fresh.update(self.embedding_cache.get_many(to_encode))
+            to_encode = [text for text in to_encode if fresh[text] is None]
+        
+        encode_size = self.embed_batch_size * max(self.encode_workers, 1)
+        for i in range(0, len(to_encode), encode_size):
+            chunk = to_encode[i:i + encode_size]
+            vectors = self._load_encoder().encode(chunk, batch_size=self.embed_batch_size)
+            self._encoded_texts += len(chunk)
+            for text, vector in zip(chunk, vectors):
+                fresh[text] = vector
+            if self.embedding_cache is not None:
+                self.embedding_cache.put_many(chunk, vectors)
+        
+        zero = [0.0] * self._embedding_dim()
+        result = []
+        for text in texts:
+            if not text:
+                result.append(zero)
+                continue
+            vector = fresh.get(text)
+            if vector is None:
+                vector = self._text_vectors[text]
+                self._text_vectors.move_to_end(text)
+            result.append(vector.tolist())
+        
+        # Remember this batch's vectors for later batches, keeping the memo bounded
+        for text, vector in fresh.items():
+            self._text_vectors[text] = vector
+        while len(self._text_vectors) > self.dedup_cache_size:
+            self._text_vectors.popitem(last=False)
+        return result
+    
+    def _build_points(self, segments: List[Tuple[str, Dict[str, Any]]], embed_text: bool) -> List[PointStruct]:
+        """Turn (point_id, payload) pairs into PointStructs, embedding their texts in one pass."""
+        from qdrant_client.http.models import PointStruct
+        if not embed_text:
+            return [PointStruct(id=point_id, payload=payload, vector={}) for point_id, payload in segments]
+        vectors = self._embed_texts([payload['text'] for _, payload in segments])
+        return [
+            PointStruct(id=point_id, payload=payload, vector=vector)
+            for (point_id, payload), vector in zip(segments, vectors)
+        ]
     
     def query_by_filter(self, collection_name: str, filter_key: str, filter_value: str, limit: int = 10) -> List[Dict]:
         """
@@ -158,8 +916,11 @@ class JSONToQdrantLoader:
         
         Returns: List of matching payloads.
         """
+        if self.backend == 'local':
+            return self._local_index(collection_name).filter(filter_key, filter_value, limit)
         if self.client is None:
             raise ValueError("Initialize client via load_to_qdrant first.")
+        from qdrant_client.http.models import Filter, FieldCondition, MatchValue
         
         filter_cond = Filter(
             must=[FieldCondition(key=filter_key, match=MatchValue(value=filter_value))]
@@ -170,82 +931,512 @@ class JSONToQdrantLoader:
             limit=limit,
             with_payload=True
         )
-        return [hit.payload for hit in results[0]]  # Extract payloads
+        return self._join_video_meta(collection_name, [hit.payload for hit in results[0]])  # Extract payloads
+    
+    def warm_up(self) -> None:
+        """Load the embedding model and run one encode, so the first query doesn't pay for it."""
+        self._init_embedder()
+        self.embedder.encode('warm up')
+    
+    def _encode_query(self, query_text: str):
+        """Query vector via the shared QueryEncoder (LRU cache + micro-batching across threads)."""
+        if self._query_encoder is None:
+            with self._query_encoder_lock:
+                if self._query_encoder is None:
+                    from query_encoder import QueryEncoder
+                    self._init_embedder()
+                    self._query_encoder = QueryEncoder(
+                        lambda texts: self.embedder.encode(texts, batch_size=len(texts)),
+                        cache_size=self.query_cache_size,
+                        max_wait=self.query_batch_wait
+                    )
+        return self._query_encoder.encode(query_text)
     
-    def semantic_search(self, collection_name: str, query_text: str, limit: int = 5) -> List[Dict]:
+    def query_stats(self) -> Dict[str, Any]:
+        """Query encoder cache/batching stats plus p50/p99 end-to-end latency per search type."""
+        from query_encoder import latency_percentiles
+        return {
+            'encoder': self._query_encoder.stats() if self._query_encoder is not None else None,
+            **{kind: latency_percentiles(latencies.copy()) for kind, latencies in self._search_latencies.items()}
+        }
+    
+    def semantic_search(
+        self,
+        collection_name: str,
+        query_text: str,
+        limit: int = 5,
+        youtuber_id: Optional[str] = None,
+        video_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> List[Dict]:
         """
         If vectors enabled: Semantic search on embedded text.
+        
+        Optional filters are applied inside Qdrant (using the payload indexes) rather than
+        on the returned hits, so limit results always match them.
+        
+        Query vectors come from an LRU cache keyed by normalized query text; concurrent
+        searches that miss it are encoded together (see query_stats()).
+        
+        Args:
+            youtuber_id/video_id: Only search this YouTuber's / video's segments.
+            date_from/date_to: Inclusive publish_date range, e.g. '2024-01-01'.
         """
-        if not self.embedder:
-            raise ValueError("Embeddings not initialized (set embed_text=True in load).")
+        started = time.perf_counter()
+        hits = self._semantic_search(collection_name, query_text, limit, youtuber_id, video_id, date_from, date_to)
+        self._search_latencies['semantic'].append(time.perf_counter() - started)
+        return hits
+    
+    def _semantic_search(
+        self,
+        collection_name: str,
+        query_text: str,
+        limit: int,
+        youtuber_id: Optional[str] = None,
+        video_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> List[Dict]:
+        if self.backend == 'local':
+            return self._local_index(collection_name).search(
+                self._encode_query(query_text), limit,
+                youtuber_id=youtuber_id, video_id=video_id, date_from=date_from, date_to=date_to
+            )
+        if self.client is None:
+            raise ValueError("Initialize client via load_to_qdrant first.")
         
-        query_vector = self.embedder.encode(query_text).tolist()
+        query_vector = self._encode_query(query_text).tolist()
         results = self.client.query_points(
             collection_name=collection_name,
             query=query_vector,
+            query_filter=self._search_filter(youtuber_id, video_id, date_from, date_to),
             limit=limit,
             with_payload=True
         )
-        return [hit.payload for hit in results.points]  # Extract payloads from QueryResponse.points
-    def get_full_video(self, collection_name: str, video_id: str, limit: int = None) -> Dict:
-    """
-    Fetch all timestamps for a video_id, sort them, and reconstruct the full video structure.
+        # Extract payloads from QueryResponse.points
+        return self._join_video_meta(collection_name, [hit.payload for hit in results.points])
     
-    Args:
-        collection_name: Qdrant collection.
-        video_id: The video's ID (e.g., 'InkQ8k5vIjE').
-        limit: Optional max timestamps to fetch (for testing; None = all).
+    def hybrid_search(
+        self,
+        collection_name: str,
+        query_text: str,
+        limit: int = 5,
+        youtuber_id: Optional[str] = None,
+        video_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        depth: Optional[int] = None,
+        rrf_k: int = 60
+    ) -> List[Dict]:
+        """
+        Keyword + semantic search: BM25 over segment texts and the vector query, merged
+        with reciprocal rank fusion, so exact names and rare terms rank alongside
+        paraphrases.
+        
+        Args:
+            youtuber_id/video_id/date_from/date_to: Filters, as in semantic_search.
+            depth: Hits taken from each retriever before fusion. Default is max(4 * limit, 20).
+            rrf_k: Reciprocal rank fusion constant. Default is 60.
+        
+        Returns:
+            List[Dict]: Segment payloads, best fused rank first.
+        """
+        started = time.perf_counter()
+        filters = {'youtuber_id': youtuber_id, 'video_id': video_id, 'date_from': date_from, 'date_to': date_to}
+        depth = depth or max(4 * limit, 20)
+        keyword_hits = self._bm25_index(collection_name).search(query_text, depth, **filters)
+        vector_hits = self._semantic_search(collection_name, query_text, depth, **filters)
+        
+        payloads = {(hit.get('video_id'), hit.get('ts_idx')): hit for hit in vector_hits}
+        from bm25_index import reciprocal_rank_fusion
+        fused = reciprocal_rank_fusion(
+            [list(payloads), [(hit['video_id'], hit['ts_idx']) for hit in keyword_hits]], rrf_k
+        )[:limit]
+        missing = [key for key in fused if key not in payloads]
+        if missing:
+            payloads.update(self._fetch_segments(collection_name, missing))
+        self._search_latencies['hybrid'].append(time.perf_counter() - started)
+        return [payloads[key] for key in fused if key in payloads]
     
-    Returns: Dict with video base + sorted 'timestamps' list.
-    """
-    if self.client is None:
-        raise ValueError("Initialize client via load_to_qdrant first.")
+    def _fetch_segments(self, collection_name: str, keys: List[Tuple[str, int]]) -> Dict[Tuple[str, int], Dict]:
+        """Payloads of specific (video_id, ts_idx) segments, with video metadata joined in."""
+        if self.backend == 'local':
+            index = self._local_index(collection_name)
+            found = [payload for video_id, ts_idx in keys for payload in index.video_segments(video_id, ts_idx, ts_idx)]
+        else:
+            points = self.client.retrieve(
+                collection_name=collection_name,
+                ids=[self._point_id(video_id, ts_idx) for video_id, ts_idx in keys],
+                with_payload=True
+            )
+            found = self._join_video_meta(collection_name, [point.payload for point in points])
+        return {(payload.get('video_id'), payload.get('ts_idx')): payload for payload in found}
     
-    filter_cond = Filter(
-        must=[FieldCondition(key="video_id", match=MatchValue(value=video_id))]
-    )
-    results = self.client.scroll(
-        collection_name=collection_name,
-        scroll_filter=filter_cond,
-        limit=limit,  # None for all
-        with_payload=True
-    )
+    @staticmethod
+    def _search_filter(
+        youtuber_id: Optional[str] = None,
+        video_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> Optional[Filter]:
+        """Qdrant filter for the optional semantic_search restrictions (None if there are none)."""
+        from qdrant_client.http.models import Filter, FieldCondition, MatchValue, DatetimeRange
+        conditions = []
+        if youtuber_id:
+            conditions.append(FieldCondition(key='youtuber_id', match=MatchValue(value=youtuber_id)))
+        if video_id:
+            conditions.append(FieldCondition(key='video_id', match=MatchValue(value=video_id)))
+        if date_from or date_to:
+            conditions.append(FieldCondition(key='publish_date', range=DatetimeRange(gte=date_from, lte=date_to)))
+        return Filter(must=conditions) if conditions else None
     
-    timestamps = []
-    for hit in results[0]:
-        ts = {
-            "start_time": hit.payload.get("start_time", 0),
-            "end_time": hit.payload.get("end_time", 0),
-            "text": hit.payload.get("text", "")
-        }
-        timestamps.append(ts)
+    def get_full_video(self, collection_name: str, video_id: str, limit: int = None) -> Dict:
+        """
+        Fetch all timestamps for a video_id, sort them, and reconstruct the full video structure.
+        
+        Segments are fetched by their deterministic point IDs with batched retrieve() calls,
+        so the whole transcript is returned however long it is. Rebuilt videos are kept in
+        an LRU cache (video_cache_size).
+        
+        Args:
+            collection_name: Qdrant collection.
+            video_id: The video's ID (e.g., 'InkQ8k5vIjE').
+            limit: Optional max timestamps to fetch (for testing; None = all).
+        
+        Returns: Dict with video base + sorted 'timestamps' list.
+        """
+        return self.get_full_videos(collection_name, [video_id], limit)[video_id]
     
-    # Sort by start_time
-    timestamps.sort(key=lambda x: x["start_time"])
+    def get_full_videos(self, collection_name: str, video_ids: List[str], limit: int = None) -> Dict[str, Dict]:
+        """
+        Batch version of get_full_video: rebuild several videos, sharing retrieve() round-trips.
+        
+        Args:
+            collection_name: Qdrant collection.
+            video_ids: Video IDs to rebuild.
+            limit: Optional max timestamps per video (None = all).
+        
+        Returns: Dict of video_id -> video dict (same shape as get_full_video).
+        """
+        if self.client is None and self.backend != 'local':
+            raise ValueError("Initialize client via load_to_qdrant first.")
+        
+        videos = {}
+        missing = []
+        with self._cache_lock:
+            for video_id in dict.fromkeys(video_ids):
+                cached = self._video_cache.get((collection_name, video_id)) if limit is None else None
+                if cached is None:
+                    missing.append(video_id)
+                else:
+                    self._video_cache.move_to_end((collection_name, video_id))
+                    videos[video_id] = cached
+        
+        if missing and self.backend == 'local':
+            index = self._local_index(collection_name)
+            last = None if limit is None else limit - 1
+            fetched = {video_id: index.video_segments(video_id, 0, last) for video_id in missing}
+        elif missing:
+            fetched = self._retrieve_video_segments(collection_name, missing, limit)
+            for video_id in missing:
+                if not fetched[video_id]:
+                    # Not loaded with deterministic IDs (or absent): fall back to a paginated scroll
+                    fetched[video_id] = self._scroll_video_segments(collection_name, video_id, limit)
+        for video_id in missing:
+            videos[video_id] = self._rebuild_video(collection_name, fetched[video_id])
+        with self._cache_lock:
+            for video_id in missing:
+                # Only complete, found videos are cached: one loaded later (e.g. by another process) must show up
+                if limit is None and fetched[video_id]:
+                    self._video_cache[(collection_name, video_id)] = videos[video_id]
+            while len(self._video_cache) > self.video_cache_size:
+                self._video_cache.popitem(last=False)
+        
+        # Copies, so callers can't modify cached videos
+        return {video_id: {**video, 'timestamps': list(video['timestamps'])} for video_id, video in videos.items()}
     
-    # Video base from first hit
-    base = results[0][0].payload if results[0] else {}
-    base["timestamps"] = timestamps
-    base.pop("start_time", None)  # Clean up promoted fields from base
-    base.pop("end_time", None)
-    base.pop("text", None)
+    def get_context(self, collection_name: str, video_id: str, ts_idx: int, k: int = 2) -> List[Dict]:
+        """
+        Fetch the segments around a hit (ts_idx - k .. ts_idx + k) in one round-trip.
+        
+        Neighbour point IDs are computed from the uuid5 scheme, so only 2k+1 small payloads
+        are transferred instead of the whole video.
+        
+        Args:
+            collection_name: Qdrant collection.
+            video_id: The hit's video ID.
+            ts_idx: The hit's segment index (the 'ts_idx' payload field of search results).
+            k: Segments to include on each side.
+        
+        Returns: List of {'ts_idx', 'start_time', 'end_time', 'text'} dicts in order.
+        """
+        return self.get_contexts(collection_name, [(video_id, ts_idx)], k)[0]
     
-    return base
-
-# Example Usage (in your app) - UPDATED FOR YOUR FILE
-# Example Usage (in your app) - RECONSTRUCT FULL VIDEO
-if __name__ == "__main__":
-    loader = JSONToQdrantLoader('ready_to_uppload_Arnest_videso.json')
-    loader.load_to_qdrant(collection_name='youtube_videos', embed_text=True)  # Init client (skip load if already done)
+    def get_contexts(self, collection_name: str, hits: List[Any], k: int = 2) -> List[List[Dict]]:
+        """
+        Batch version of get_context for a whole result page, using a single retrieve() call.
+        
+        Args:
+            collection_name: Qdrant collection.
+            hits: (video_id, ts_idx) tuples or result payloads with 'video_id' and 'ts_idx'.
+            k: Segments to include on each side of each hit.
+        
+        Returns: One context list per hit, in the same order as hits.
+        """
+        positions = [(hit['video_id'], hit['ts_idx']) if isinstance(hit, dict) else tuple(hit) for hit in hits]
+        if self.backend == 'local':
+            index = self._local_index(collection_name)
+            return [
+                [{key: payload[key] for key in SEGMENT_FIELDS + WINDOW_FIELDS if key in payload}
+                 for payload in index.video_segments(video_id, max(ts_idx - k, 0), ts_idx + k)]
+                for video_id, ts_idx in positions
+            ]
+        if self.client is None:
+            raise ValueError("Initialize client via load_to_qdrant first.")
+        
+        wanted = {}
+        for video_id, ts_idx in positions:
+            for idx in range(max(ts_idx - k, 0), ts_idx + k + 1):
+                wanted[self._point_id(video_id, idx)] = (video_id, idx)
+        records = self.client.retrieve(
+            collection_name=collection_name,
+            ids=list(wanted),
+            with_payload=list(SEGMENT_FIELDS + WINDOW_FIELDS),
+            with_vectors=False
+        ) if wanted else []
+        
+        segments = {}
+        for record in records:
+            video_id, idx = wanted[str(record.id)]
+            segments[(video_id, idx)] = {'ts_idx': idx, **record.payload}
+        return [
+            [segments[(video_id, idx)] for idx in range(max(ts_idx - k, 0), ts_idx + k + 1) if (video_id, idx) in segments]
+            for video_id, ts_idx in positions
+        ]
     
-    # Reconstruct a full video (use a real video_id from dashboard or your JSON)
-    sample_video_id = 'InkQ8k5vIjE'  # From your sample
-    full_video = loader.get_full_video('youtube_videos', sample_video_id)
+    def _retrieve_video_segments(
+        self, collection_name: str, video_ids: List[str], limit: Optional[int] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch segment payloads in ts_idx order by probing point IDs video_id_0, video_id_1, ...
+        
+        Each round asks for the next block of IDs of every unfinished video in a single
+        retrieve() call; a video is complete once a block comes back short. Blocks double in
+        size each round so long lives need only a few round-trips.
+        """
+        segments = {video_id: [] for video_id in video_ids}
+        block = self.retrieve_batch_size
+        pending = list(video_ids)
+        while pending:
+            wanted = {}
+            for video_id in pending:
+                start = len(segments[video_id])
+                count = block if limit is None else min(block, limit - start)
+                for ts_idx in range(start, start + count):
+                    wanted[self._point_id(video_id, ts_idx)] = (video_id, ts_idx)
+            records = self.client.retrieve(
+                collection_name=collection_name, ids=list(wanted), with_payload=True, with_vectors=False
+            )
+            found = {video_id: {} for video_id in pending}
+            for record in records:
+                video_id, ts_idx = wanted[str(record.id)]
+                found[video_id][ts_idx] = record.payload
+            
+            still_pending = []
+            for video_id in pending:
+                start = len(segments[video_id])
+                requested = block if limit is None else min(block, limit - start)
+                # IDs are contiguous, so stop at the first gap
+                ts_idx = start
+                while ts_idx in found[video_id]:
+                    segments[video_id].append(found[video_id][ts_idx])
+                    ts_idx += 1
+                complete = ts_idx - start < requested or (limit is not None and len(segments[video_id]) >= limit)
+                if not complete:
+                    still_pending.append(video_id)
+            pending = still_pending
+            block = min(block * 2, self.retrieve_batch_size * 16)
+        return segments
     
-    print(f"Reconstructed video: {full_video['video_title']}")
-    print(f"Total timestamps (sentences): {len(full_video['timestamps'])}")
-    print("\nFirst 5 timestamps:")
-    for i, ts in enumerate(full_video['timestamps'][:5]):
-        print(f"  {i+1}. [{ts['start_time']}-{ts['end_time']}] {ts['text'][:100]}...")
+    def _scroll_video_segments(self, collection_name: str, video_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Fetch a video's segment payloads with a filtered scroll, following next_page_offset to the end."""
+        from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+        filter_cond = Filter(
+            must=[FieldCondition(key="video_id", match=MatchValue(value=video_id))]
+        )
+        payloads = []
+        offset = None
+        while limit is None or len(payloads) < limit:
+            page_size = self.retrieve_batch_size if limit is None else min(self.retrieve_batch_size, limit - len(payloads))
+            hits, offset = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=filter_cond,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            payloads.extend(hit.payload for hit in hits)
+            if offset is None:
+                break
+        return payloads
     
-    print(f"\nFull video URL: {full_video['video_url']}")
+    def _rebuild_video(self, collection_name: str, payloads: List[Dict[str, Any]]) -> Dict:
+        """Build a video dict (base fields + sorted 'timestamps') from its segment payloads."""
+        timestamps = [
+            {
+                "start_time": payload.get("start_time", 0),
+                "end_time": payload.get("end_time", 0),
+                "text": payload.get("text", ""),
+                # Chunked loads: which original timestamps the window covers
+                **{key: payload[key] for key in WINDOW_FIELDS if key in payload}
+            }
+            for payload in payloads
+        ]
+        timestamps.sort(key=lambda x: x["start_time"])  # Stable: equal start times keep ts_idx order
+        
+        # Video base from the first segment, without the promoted segment fields
+        segment_keys = SEGMENT_FIELDS + WINDOW_FIELDS
+        base = {key: value for key, value in payloads[0].items() if key not in segment_keys} if payloads else {}
+        if base:
+            self._join_video_meta(collection_name, [base])
+        base["timestamps"] = timestamps
+        return base
+
+def _add_connection_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--collection', default='youtube_videos', help="Collection name (default: youtube_videos)")
+    parser.add_argument('--backend', choices=('qdrant', 'local'), default='qdrant')
+    parser.add_argument('--local-index-dir', default='local_index')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=6333)
+    parser.add_argument('--location', help="QdrantClient location (e.g. ':memory:') instead of host/port; "
+                                           "its calls are serialized, so it doesn't measure upload concurrency")
+
+
+def _add_search_filters(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--youtuber-id')
+    parser.add_argument('--video-id')
+    parser.add_argument('--date-from', help="Inclusive publish_date lower bound, e.g. 2024-01-01")
+    parser.add_argument('--date-to', help="Inclusive publish_date upper bound")
+
+
+def _print_json(value: Any) -> None:
+    print(json.dumps(value, ensure_ascii=False, indent=2))
+
+
+def _run_search(loader: JSONToQdrantLoader, args: argparse.Namespace, query: str) -> None:
+    """Run one search query and print its hits and latency."""
+    search = loader.hybrid_search if args.hybrid else loader.semantic_search
+    started = time.perf_counter()
+    hits = search(
+        args.collection, query, args.limit,
+        youtuber_id=args.youtuber_id, video_id=args.video_id, date_from=args.date_from, date_to=args.date_to
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if args.json:
+        _print_json(hits)
+    else:
+        for hit in hits:
+            print(f"{hit.get('video_id')} #{hit.get('ts_idx')} @ {hit.get('start_time', 0):.0f}s  {hit.get('text', '')[:100]}")
+    print(f"{len(hits)} hits in {elapsed_ms:.1f} ms", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command-line entry point:
+
+        python load_to_qdrant.py load transcripts.json --embed --stream
+        python load_to_qdrant.py query youtuber_id 1
+        python load_to_qdrant.py search "ابن رشد" --hybrid
+        python load_to_qdrant.py search --interactive      # one warm model, queries from stdin
+        python load_to_qdrant.py get-video InkQ8k5vIjE
+
+    Only the dependencies a command needs are imported: query and get-video never load
+    the embedding model (or torch), and the local backend never imports qdrant_client.
+    """
+    parser = argparse.ArgumentParser(description="Load transcripts into Qdrant (or a local index) and query them")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    load = subparsers.add_parser('load', help="Load a transcript JSON file")
+    load.add_argument('input_file')
+    _add_connection_args(load)
+    load.add_argument('--embed', action='store_true', help="Embed segment texts (needs sentence-transformers)")
+    load.add_argument('--stream', action='store_true', help="Parse the input incrementally instead of reading it whole")
+    load.add_argument('--cache-dir', help="Persistent embedding cache directory")
+    load.add_argument('--encode-workers', type=int, default=1, help="Encoder processes (default: 1)")
+    load.add_argument('--incremental', action='store_true')
+    load.add_argument('--prune-missing', action='store_true')
+    load.add_argument('--resume', action='store_true')
+    load.add_argument('--metadata-store', choices=('inline', 'collection', 'sidecar'), default='inline')
+    keyword_index = load.add_mutually_exclusive_group()
+    keyword_index.add_argument('--keyword-index', dest='keyword_index', action='store_true', default=None,
+                               help="Build the BM25 index used by hybrid search (default unless --stream)")
+    keyword_index.add_argument('--no-keyword-index', dest='keyword_index', action='store_false',
+                               help="Skip the BM25 index used by hybrid search")
+    load.add_argument('--chunk-seconds', type=float, help="Merge timestamps into windows of at most this many seconds")
+    load.add_argument('--chunk-tokens', type=int, help="Merge timestamps into windows of at most this many words")
+    load.add_argument('--chunk-overlap', type=int, default=0, help="Timestamps shared by consecutive windows")
+
+    query = subparsers.add_parser('query', help="Segments whose payload field equals a value")
+    query.add_argument('key')
+    query.add_argument('value')
+    _add_connection_args(query)
+    query.add_argument('--limit', type=int, default=10)
+
+    search = subparsers.add_parser('search', help="Semantic (or hybrid) search")
+    search.add_argument('query', nargs='?')
+    _add_connection_args(search)
+    _add_search_filters(search)
+    search.add_argument('--hybrid', action='store_true', help="Fuse BM25 keyword and vector results")
+    search.add_argument('--interactive', action='store_true',
+                        help="Warm the model once, then answer one query per stdin line")
+    search.add_argument('--json', action='store_true', help="Print full payloads as JSON")
+
+    get_video = subparsers.add_parser('get-video', help="Rebuild a full video from its segments")
+    get_video.add_argument('video_id')
+    _add_connection_args(get_video)
+    args = parser.parse_args(argv)
+
+    loader = JSONToQdrantLoader(
+        getattr(args, 'input_file', ''), backend=args.backend, local_index_dir=args.local_index_dir
+    )
+    if args.command == 'load':
+        chunker = None
+        if args.chunk_seconds or args.chunk_tokens:
+            chunker = SegmentChunker(args.chunk_seconds, args.chunk_tokens, args.chunk_overlap)
+        if not args.stream:
+            loader.read()
+        loader.load_to_qdrant(
+            collection_name=args.collection, embed_text=args.embed, host=args.host, port=args.port,
+            cache_dir=args.cache_dir, stream=args.stream, location=args.location,
+            incremental=args.incremental, prune_missing=args.prune_missing, resume=args.resume,
+            metadata_store=args.metadata_store, keyword_index=args.keyword_index,
+            chunker=chunker, encode_workers=args.encode_workers
+        )
+        return
+
+    if args.backend == 'qdrant':
+        loader._init_client(args.host, args.port, args.location)
+    if args.command == 'query':
+        _print_json(loader.query_by_filter(args.collection, args.key, args.value, args.limit))
+    elif args.command == 'get-video':
+        _print_json(loader.get_full_video(args.collection, args.video_id))
+    elif args.interactive:
+        started = time.perf_counter()
+        loader.warm_up()
+        print(f"Model ready in {time.perf_counter() - started:.1f}s; one query per line (Ctrl-D to quit).",
+              file=sys.stderr)
+        for line in sys.stdin:
+            if line.strip():
+                _run_search(loader, args, line.strip())
+        print(f"Query stats: {loader.query_stats()}", file=sys.stderr)
+    elif args.query:
+        _run_search(loader, args, args.query)
+    else:
+        parser.error("search needs a query (or --interactive).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from arabic_normalize import normalize_arabic
+
+# One fixed-size record per segment; text lives in text.bin at [text_offset, text_offset + text_length)
+SEGMENT_DTYPE = np.dtype([
+    ('video', '<i4'),
+    ('ts_idx', '<i4'),
+    ('start_time', '<f8'),
+    ('end_time', '<f8'),
+    ('text_offset', '<i8'),
+    ('text_length', '<i4')
+])
+# Window records of chunked loads; seg_starts values live in seg_starts.bin at [starts_offset, +starts_length)
+WINDOW_DTYPE = np.dtype([
+    ('seg_first', '<i4'),
+    ('seg_last', '<i4'),
+    ('starts_offset', '<i8'),
+    ('starts_length', '<i4')
+])
+SEGMENT_KEYS = (
+    'ts_idx', 'start_time', 'end_time', 'text', 'text_normalized', 'seg_first', 'seg_last', 'seg_starts'
+)  # Not video-level
+
+
+class LocalIndexWriter:
+    """
+    Builds a LocalVectorIndex directory from segment payloads and (optionally) their vectors.
+
+    Files:
+        meta.json     - count, dim, dtype (written last, so a half-written index is never opened)
+        vectors.bin   - row-major unit-normalized float32/float16 matrix, one row per segment
+        segments.bin  - SEGMENT_DTYPE records (video row, ts_idx, times, text span)
+        text.bin      - UTF-8 segment texts, back to back
+        videos.json   - video-level metadata, one entry per video row
+        windows.bin   - WINDOW_DTYPE records, only for chunked loads (windows=True)
+        seg_starts.bin - float64 start times of the timestamps merged into each window
+
+    Usage:
+    writer = LocalIndexWriter('local_index/youtube_videos', dtype='float16')
+    writer.add(payloads, vectors)
+    writer.close()
+    """
+
+    def __init__(self, path: str, dtype: str = 'float32', windows: bool = False):
+        """
+        Args:
+            path (str): Index directory (existing index files are replaced).
+            dtype (str): Stored vector precision, 'float32' or 'float16'. Default is 'float32'.
+            windows (bool): Also store seg_first/seg_last/seg_starts of chunked payloads. Default is False.
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self.dim: Optional[int] = None
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            os.remove(os.path.join(path, 'meta.json'))
+        self._vectors = open(os.path.join(path, 'vectors.bin'), 'wb')
+        self._segments = open(os.path.join(path, 'segments.bin'), 'wb')
+        self._text = open(os.path.join(path, 'text.bin'), 'wb')
+        self._text_offset = 0
+        self._windows = self._seg_starts = None
+        if windows:
+            self._windows = open(os.path.join(path, 'windows.bin'), 'wb')
+            self._seg_starts = open(os.path.join(path, 'seg_starts.bin'), 'wb')
+        self._starts_offset = 0
+        self._videos: List[Dict[str, Any]] = []
+        self._video_rows: Dict[str, int] = {}
+
+    def add(self, payloads: List[Dict[str, Any]], vectors=None) -> None:
+        """
+        Append segments. Fields other than SEGMENT_KEYS are treated as video-level metadata
+        and stored once per video.
+        """
+        records = np.empty(len(payloads), dtype=SEGMENT_DTYPE)
+        for i, payload in enumerate(payloads):
+            video_id = payload.get('video_id', '')
+            video_row = self._video_rows.get(video_id)
+            if video_row is None:
+                video_row = self._video_rows[video_id] = len(self._videos)
+                self._videos.append({key: value for key, value in payload.items() if key not in SEGMENT_KEYS})
+            text = (payload.get('text') or '').encode('utf-8')
+            records[i] = (
+                video_row, payload.get('ts_idx', 0), payload.get('start_time') or 0,
+                payload.get('end_time') or 0, self._text_offset, len(text)
+            )
+            self._text.write(text)
+            self._text_offset += len(text)
+        self._segments.write(records.tobytes())
+        if self._windows is not None:
+            self._add_windows(payloads)
+
+        if vectors is not None:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)  # Unit rows: dot product == cosine
+            self.dim = matrix.shape[1]
+            self._vectors.write(matrix.astype(self.dtype).tobytes())
+        self.count += len(payloads)
+
+    def _add_windows(self, payloads: List[Dict[str, Any]]) -> None:
+        records = np.empty(len(payloads), dtype=WINDOW_DTYPE)
+        for i, payload in enumerate(payloads):
+            starts = np.asarray(payload.get('seg_starts') or [], dtype='<f8')
+            records[i] = (payload.get('seg_first', 0), payload.get('seg_last', 0), self._starts_offset, len(starts))
+            self._seg_starts.write(starts.tobytes())
+            self._starts_offset += len(starts)
+        self._windows.write(records.tobytes())
+
+    def close(self) -> None:
+        """Flush all files and write the video table and meta.json."""
+        for f in (self._vectors, self._segments, self._text, self._windows, self._seg_starts):
+            if f is not None:
+                f.close()
+        for name in ('windows.bin', 'seg_starts.bin'):
+            if self._windows is None and os.path.exists(os.path.join(self.path, name)):
+                os.remove(os.path.join(self.path, name))  # Left over from an earlier chunked build
+        with open(os.path.join(self.path, 'videos.json'), 'w', encoding='utf-8') as f:
+            json.dump(self._videos, f, ensure_ascii=False)
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'count': self.count, 'dim': self.dim, 'dtype': self.dtype.name,
+                'windows': self._windows is not None, 'seg_starts': self._starts_offset
+            }, f)
+
+
+class LocalVectorIndex:
+    """
+    Embedded, memory-mapped alternative to a Qdrant collection for offline use and CI.
+
+    Opening is instant (files are mmapped, nothing is parsed except the video table).
+    Top-k search is a vectorized dot product over the unit-normalized matrix followed by
+    argpartition; youtuber/video/date filters first narrow the candidate rows.
+    """
+
+    SEARCH_BLOCK = 1 << 18  # Rows scored per block when searching without filters
+    ROW_CACHE_SIZE = 64  # Cached candidate-row arrays for repeated filters
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Directory written by LocalIndexWriter.
+
+        Raises:
+            FileNotFoundError: If the directory holds no complete index.
+        """
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(path, 'videos.json'), 'r', encoding='utf-8') as f:
+            self.videos: List[Dict[str, Any]] = json.load(f)
+        self.count = meta['count']
+        self.dim = meta['dim']
+        self.segments = self._memmap(os.path.join(path, 'segments.bin'), SEGMENT_DTYPE, (self.count,))
+        self.vectors = None
+        if self.dim:
+            self.vectors = self._memmap(os.path.join(path, 'vectors.bin'), np.dtype(meta['dtype']), (self.count, self.dim))
+        text_size = os.path.getsize(os.path.join(path, 'text.bin'))
+        self._text = self._memmap(os.path.join(path, 'text.bin'), np.uint8, (text_size,))
+        self.windows = self.seg_starts = None
+        if meta.get('windows'):
+            self.windows = self._memmap(os.path.join(path, 'windows.bin'), WINDOW_DTYPE, (self.count,))
+            self.seg_starts = self._memmap(os.path.join(path, 'seg_starts.bin'), np.dtype('<f8'), (meta['seg_starts'],))
+        self._video_rows = {video.get('video_id', ''): row for row, video in enumerate(self.videos)}
+        self._row_cache: OrderedDict = OrderedDict()
+        self._row_cache_lock = threading.Lock()  # Searches run on many threads
+
+    @staticmethod
+    def _memmap(file_path: str, dtype, shape):
+        if not shape[0]:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode='r', shape=shape)
+
+    def payload(self, row: int) -> Dict[str, Any]:
+        """Full payload (video metadata + segment fields) of one segment row, like a Qdrant point."""
+        record = self.segments[row]
+        start = int(record['text_offset'])
+        text = self._text[start:start + int(record['text_length'])].tobytes().decode('utf-8')
+        payload = {
+            **self.videos[int(record['video'])],
+            'ts_idx': int(record['ts_idx']),
+            'start_time': float(record['start_time']),
+            'end_time': float(record['end_time']),
+            'text': text,
+            'text_normalized': normalize_arabic(text)  # Derived, not stored
+        }
+        if self.windows is not None:
+            window = self.windows[row]
+            starts = int(window['starts_offset'])
+            payload['seg_first'] = int(window['seg_first'])
+            payload['seg_last'] = int(window['seg_last'])
+            payload['seg_starts'] = self.seg_starts[starts:starts + int(window['starts_length'])].tolist()
+        return payload
+
+    def candidate_rows(
+        self,
+        youtuber_id: Optional[str] = None,
+        video_id: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        """Segment rows matching the filters, or None if no filter is set."""
+        if not (youtuber_id or video_id or date_from or date_to):
+            return None
+        key = (youtuber_id, video_id, date_from, date_to)
+        with self._row_cache_lock:
+            rows = self._row_cache.get(key)
+            if rows is not None:
+                self._row_cache.move_to_end(key)
+                return rows
+
+        video_rows = [
+            row for row, video in enumerate(self.videos)
+            if (not youtuber_id or video.get('youtuber_id') == youtuber_id)
+            and (not video_id or video.get('video_id') == video_id)
+            and self._date_matches(video.get('publish_date') or '', date_from, date_to)
+        ]
+        rows = np.flatnonzero(np.isin(self.segments['video'], video_rows))
+        with self._row_cache_lock:
+            self._row_cache[key] = rows
+            while len(self._row_cache) > self.ROW_CACHE_SIZE:
+                self._row_cache.popitem(last=False)
+        return rows
+
+    @staticmethod
+    def _date_matches(publish_date: str, date_from: Optional[str], date_to: Optional[str]) -> bool:
+        """Inclusive ISO date range check; videos without a date never match a date filter."""
+        if not (date_from or date_to):
+            return True
+        if not publish_date:
+            return False
+        if date_from and publish_date[:len(date_from)] < date_from:
+            return False
+        return not date_to or publish_date[:len(date_to)] <= date_to
+
+    def search(self, query_vector, limit: int = 5, **filters) -> List[Dict[str, Any]]:
+        """
+        Top-`limit` segments by cosine similarity to query_vector.
+
+        Args:
+            query_vector: Query embedding (normalized here).
+            limit (int): Number of hits. Default is 5.
+            **filters: youtuber_id, video_id, date_from, date_to (see candidate_rows).
+
+        Returns:
+            List[Dict[str, Any]]: Payloads of the best hits, best first.
+        """
+        if self.vectors is None:
+            raise ValueError("This local index was built without vectors (embed_text=False).")
+        query = np.array(query_vector, dtype=np.float32)  # Copy: cached query vectors are read-only
+        query /= np.linalg.norm(query) or 1.0
+
+        rows = self.candidate_rows(**filters)
+        if rows is not None:
+            scores = np.asarray(self.vectors[rows], dtype=np.float32) @ query
+            best = self._top_k(scores, limit)
+            return [self.payload(int(rows[i])) for i in best]
+
+        top_rows, top_scores = [], []
+        for start in range(0, self.count, self.SEARCH_BLOCK):
+            scores = np.asarray(self.vectors[start:start + self.SEARCH_BLOCK], dtype=np.float32) @ query
+            best = self._top_k(scores, limit)
+            top_rows.append(best + start)
+            top_scores.append(scores[best])
+        if not top_rows:
+            return []
+        top_rows, top_scores = np.concatenate(top_rows), np.concatenate(top_scores)
+        return [self.payload(int(top_rows[i])) for i in self._top_k(top_scores, limit)]
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k largest scores, best first."""
+        if len(scores) > k:
+            candidates = np.argpartition(-scores, k)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    def filter(self, key: str, value: Any, limit: int = 10) -> List[Dict[str, Any]]:
+        """First `limit` segment payloads whose video-level field `key` equals value."""
+        if key == 'youtuber_id':
+            rows = self.candidate_rows(youtuber_id=value)
+        elif key == 'video_id':
+            rows = self.candidate_rows(video_id=value)
+        else:
+            video_rows = [row for row, video in enumerate(self.videos) if video.get(key) == value]
+            rows = np.flatnonzero(np.isin(self.segments['video'], video_rows))
+        return [self.payload(int(row)) for row in rows[:limit]]
+
+    def video_segments(self, video_id: str, first: int = 0, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Payloads of a video's segments with first <= ts_idx <= last, in ts_idx order."""
+        if video_id not in self._video_rows:
+            return []
+        rows = self.candidate_rows(video_id=video_id)
+        ts_idx = self.segments['ts_idx'][rows]
+        keep = ts_idx >= first if last is None else (ts_idx >= first) & (ts_idx <= last)
+        rows = rows[keep][np.argsort(ts_idx[keep], kind='stable')]
+        return [self.payload(int(row)) for row in rows]
@@ -0,0 +1,163 @@
+"""
+Query-side embedding: an LRU cache of query vectors plus micro-batching of concurrent
+cache misses into a single encode() call.
+"""
+
+import queue
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List
+
+import numpy as np
+
+from arabic_normalize import normalize_arabic
+
+
+class QueryEncoder:
+    """
+    Thread-safe query encoder for search traffic.
+
+    Queries are keyed by their normalized text (NFC + Arabic normalization), so
+    popular searches and their spelling variants are encoded once. Misses are queued
+    for a background thread that waits up to max_wait seconds for more queries and then
+    encodes the whole batch (at most max_batch texts) in one call; concurrent requests for
+    the same text share one encode.
+
+    Usage:
+    encoder = QueryEncoder(lambda texts: model.encode(texts))
+    vector = encoder.encode('ابن رشد')       # from any thread
+    print(encoder.stats())                   # hit rate, batch sizes, p50/p99 latency
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], Any],
+        cache_size: int = 4096,
+        max_batch: int = 32,
+        max_wait: float = 0.002,
+        latency_window: int = 10000
+    ):
+        """
+        Args:
+            encode_batch: Encodes a list of texts, returning one vector per text.
+            cache_size (int): Query vectors kept in the LRU cache. Default is 4096.
+            max_batch (int): Maximum queries per encode call. Default is 32.
+            max_wait (float): Seconds a miss waits for other queries to batch with. Default is 0.002.
+            latency_window (int): Recent queries kept for the latency percentiles. Default is 10000.
+        """
+        self.encode_batch = encode_batch
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._cache: OrderedDict = OrderedDict()  # Normalized text -> read-only vector, least recent first
+        self._pending: Dict[str, Future] = {}  # Normalized text -> result of a queued or running encode
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._latencies: deque = deque(maxlen=latency_window)
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_queries = 0
+        self._worker = threading.Thread(target=self._run, name='query-encoder', daemon=True)
+        self._worker.start()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Cache key of a query."""
+        return normalize_arabic(unicodedata.normalize('NFC', text))
+
+    def encode(self, text: str) -> np.ndarray:
+        """Vector of one query (read-only; copy it before modifying)."""
+        started = time.perf_counter()
+        key = self.normalize(text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                future = self._pending.get(key)
+                if future is None:
+                    future = self._pending[key] = Future()
+                    self._queue.put((key, text))
+        if vector is None:
+            vector = future.result()
+        self._latencies.append(time.perf_counter() - started)
+        return vector
+
+    def _run(self) -> None:
+        """Batching thread: collect queued misses for up to max_wait seconds, then encode them together."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)  # Finish this batch, stop on the next loop
+                    break
+                batch.append(item)
+            self._encode(batch)
+
+    def _encode(self, batch: List[tuple]) -> None:
+        keys = [key for key, _ in batch]
+        try:
+            vectors = np.asarray(self.encode_batch([text for _, text in batch]), dtype=np.float32)
+        except BaseException as e:
+            with self._lock:
+                futures = [self._pending.pop(key) for key in keys]
+            for future in futures:
+                future.set_exception(e)
+            return
+        vectors.setflags(write=False)
+        with self._lock:
+            self.batches += 1
+            self.batched_queries += len(batch)
+            futures = []
+            for key, vector in zip(keys, vectors):
+                self._cache[key] = vector
+                futures.append(self._pending.pop(key))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        for future, vector in zip(futures, vectors):
+            future.set_result(vector)
+
+    def stats(self) -> Dict[str, float]:
+        """Cache hit rate, average encode batch size and per-query encode latency percentiles (ms)."""
+        lookups = self.hits + self.misses
+        return {
+            'queries': lookups,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'cache_entries': len(self._cache),
+            'batches': self.batches,
+            'avg_batch': self.batched_queries / self.batches if self.batches else 0.0,
+            **latency_percentiles(self._latencies.copy())  # copy() is atomic; appends may be concurrent
+        }
+
+    def close(self) -> None:
+        """Stop the batching thread once queued queries are encoded."""
+        self._queue.put(None)
+        self._worker.join()
+
+
+def latency_percentiles(latencies: Iterable[float]) -> Dict[str, float]:
+    """p50/p99 (in ms) of latencies given in seconds."""
+    values = sorted(latencies)
+    if not values:
+        return {'p50_ms': 0.0, 'p99_ms': 0.0}
+    return {
+        'p50_ms': values[min(int(0.50 * len(values)), len(values) - 1)] * 1000,
+        'p99_ms': values[min(int(0.99 * len(values)), len(values) - 1)] * 1000
+    }
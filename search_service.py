@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Small asyncio HTTP/JSON service around JSONToQdrantLoader's query methods, so the
+frontend and batch jobs share one warm process (one Qdrant client, one model).
+
+    python search_service.py --collection youtube_videos --port 8080
+    curl 'localhost:8080/search?q=ابن+رشد&limit=5&hybrid=1'
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from load_to_qdrant import JSONToQdrantLoader
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_LIMIT = 1000  # Largest limit (or context k) a request may ask for
+
+
+class HTTPError(Exception):
+    """Request error reported to the client with the given status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class SearchService:
+    """
+    Serves one loader (and so one Qdrant client with its pooled HTTP connections and one
+    embedding model) over HTTP.
+
+    Handlers run the loader's blocking query methods on a thread pool of max_concurrency
+    workers; requests beyond that wait, and once max_pending requests are waiting new
+    ones get 503. Connections are kept alive between requests.
+
+    Request parameters are validated up front (400); any error raised by the loader after
+    that is a server-side problem: 503 for a missing index, 500 otherwise.
+
+    Endpoints (GET, JSON responses):
+        /search?q=...&limit=&youtuber_id=&video_id=&date_from=&date_to=&hybrid=1
+        /filter?key=...&value=...&limit=
+        /video/<video_id>
+        /context?video_id=...&ts_idx=...&k=
+        /stats, /health
+    """
+
+    def __init__(self, loader: JSONToQdrantLoader, collection_name: str, max_concurrency: int = 8, max_pending: int = 256):
+        """
+        Args:
+            loader (JSONToQdrantLoader): Loader with its client initialized (or backend='local').
+            collection_name (str): Collection to query.
+            max_concurrency (int): Requests executed at once. Default is 8.
+            max_pending (int): Waiting requests before new ones are rejected with 503. Default is 256.
+        """
+        self.loader = loader
+        self.collection_name = collection_name
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='search')
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self.requests = 0
+        self.rejected = 0
+        self._routes: Dict[str, Callable[[Dict[str, str], str], Any]] = {
+            'search': self._search,
+            'filter': self._filter,
+            'video': self._video,
+            'context': self._context,
+            'stats': self._stats,
+            'health': lambda params, arg: {'status': 'ok'}
+        }
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080, warm: bool = True) -> None:
+        """Load the model (unless warm=False), then serve until cancelled."""
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        if warm:
+            started = time.perf_counter()
+            await loop.run_in_executor(self._executor, self.loader.warm_up)
+            print(f"Model ready in {time.perf_counter() - started:.1f}s")
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        print(f"Serving '{self.collection_name}' on http://{host}:{port} (max {self.max_concurrency} concurrent requests)")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, keep_alive = request
+                status, body = await self._dispatch(method, target)
+                self._write_response(writer, status, body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass  # Client went away or sent garbage; just close
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bool]]:
+        """Parse one request head (the body, if any, is read and ignored)."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise
+            return None  # Client closed the connection between requests
+        lines = head.decode('latin-1').split('\r\n')
+        method, target, version = lines[0].split(' ', 2)
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length') or 0)
+        if length:
+            await reader.readexactly(length)
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+        return method, target, keep_alive
+
+    async def _dispatch(self, method: str, target: str) -> Tuple[HTTPStatus, Any]:
+        self.requests += 1
+        if method != 'GET':
+            return HTTPStatus.METHOD_NOT_ALLOWED, {'error': 'Only GET is supported.'}
+        url = urlsplit(target)
+        route, _, arg = url.path.strip('/').partition('/')
+        handler = self._routes.get(route)
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {'error': f"Unknown endpoint '/{route}'."}
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'Too many pending requests.'}
+        self._pending += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, handler, params, unquote(arg))
+            return HTTPStatus.OK, result
+        except HTTPError as e:
+            return e.status, {'error': str(e)}
+        except FileNotFoundError as e:
+            # An index the request needs (e.g. the keyword index for hybrid=1) isn't on the server
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': f"Index unavailable: {e}"}
+        except Exception as e:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f"{type(e).__name__}: {e}"}
+        finally:
+            self._pending -= 1
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: HTTPStatus, body: Any, keep_alive: bool) -> None:
+        payload = json.dumps(body, ensure_ascii=False, default=str).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Access-Control-Allow-Origin: *\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + payload)
+
+    @staticmethod
+    def _required(params: Dict[str, str], name: str) -> str:
+        value = params.get(name)
+        if not value:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Missing '{name}' parameter.")
+        return value
+
+    @staticmethod
+    def _int(
+        params: Dict[str, str], name: str, default: Optional[int] = None, minimum: int = 0, maximum: Optional[int] = MAX_LIMIT
+    ) -> int:
+        """Integer parameter in [minimum, maximum] (required if there is no default)."""
+        value = params.get(name)
+        if not value:
+            if default is None:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"Missing '{name}' parameter.")
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer.") from None
+        if number < minimum or (maximum is not None and number > maximum):
+            bounds = f"between {minimum} and {maximum}" if maximum is not None else f"at least {minimum}"
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{name}' must be {bounds}.")
+        return number
+
+    @staticmethod
+    def _date(params: Dict[str, str], name: str) -> Optional[str]:
+        """Optional ISO date (or date-time) parameter."""
+        value = params.get(name)
+        if value:
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an ISO date such as 2024-01-31.") from None
+        return value or None
+
+    # Handlers run on the executor threads
+
+    def _search(self, params: Dict[str, str], arg: str) -> Any:
+        hybrid = params.get('hybrid') in ('1', 'true')
+        search = self.loader.hybrid_search if hybrid else self.loader.semantic_search
+        return search(
+            self.collection_name,
+            self._required(params, 'q'),
+            self._int(params, 'limit', 5, minimum=1),
+            youtuber_id=params.get('youtuber_id'),
+            video_id=params.get('video_id'),
+            date_from=self._date(params, 'date_from'),
+            date_to=self._date(params, 'date_to')
+        )
+
+    def _filter(self, params: Dict[str, str], arg: str) -> Any:
+        return self.loader.query_by_filter(
+            self.collection_name, self._required(params, 'key'), self._required(params, 'value'),
+            self._int(params, 'limit', 10, minimum=1)
+        )
+
+    def _video(self, params: Dict[str, str], arg: str) -> Any:
+        video_id = arg or self._required(params, 'video_id')
+        video = self.loader.get_full_video(self.collection_name, video_id)
+        if not video.get('timestamps'):
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Video '{video_id}' not found.")
+        return video
+
+    def _context(self, params: Dict[str, str], arg: str) -> Any:
+        return self.loader.get_context(
+            self.collection_name, self._required(params, 'video_id'), self._int(params, 'ts_idx', maximum=None),
+            self._int(params, 'k', 2)
+        )
+
+    def _stats(self, params: Dict[str, str], arg: str) -> Any:
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'pending': self._pending,
+            **self.loader.query_stats()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP search service over a loaded collection")
+    parser.add_argument('--collection', default='youtube_videos')
+    parser.add_argument('--backend', choices=('qdrant', 'local'), default='qdrant')
+    parser.add_argument('--local-index-dir', default='local_index')
+    parser.add_argument('--bm25-dir', default='bm25_index', help="Directory holding the collection's keyword index (hybrid=1)")
+    parser.add_argument('--qdrant-host', default='localhost')
+    parser.add_argument('--qdrant-port', type=int, default=6333)
+    parser.add_argument('--location', help="QdrantClient location, e.g. ':memory:' for an in-process stand-in")
+    parser.add_argument('--load', metavar='INPUT_FILE',
+                        help="Load (and embed) this transcript JSON into the collection first, e.g. with --location :memory:")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-concurrency', type=int, default=8)
+    parser.add_argument('--max-pending', type=int, default=256)
+    parser.add_argument('--no-warm', action='store_true', help="Load the model on the first search instead of at startup")
+    args = parser.parse_args()
+
+    loader = JSONToQdrantLoader(args.load or '', backend=args.backend, local_index_dir=args.local_index_dir)
+    loader.bm25_dir = args.bm25_dir
+    if args.load:
+        loader.load_to_qdrant(
+            collection_name=args.collection, embed_text=True, stream=True,
+            host=args.qdrant_host, port=args.qdrant_port, location=args.location
+        )
+    elif args.backend == 'qdrant':
+        loader._init_client(args.qdrant_host, args.qdrant_port, args.location)
+
+    service = SearchService(loader, args.collection, args.max_concurrency, args.max_pending)
+    try:
+        asyncio.run(service.serve(args.host, args.port, warm=not args.no_warm))
+    except KeyboardInterrupt:
+        print("Stopped.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Merges consecutive caption timestamps into larger windows before loading, so short
+auto-caption fragments become fewer, better-embedding points.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from arabic_normalize import normalize_arabic
+
+
+class SegmentChunker:
+    """
+    Groups a video's timestamps into windows bounded by duration and/or token count.
+
+    Each window keeps the first start_time and last end_time of the timestamps it merges,
+    plus the range of original timestamp indices it covers (seg_first..seg_last) and
+    their start times (seg_starts), so a hit can still seek to the exact caption.
+
+    Usage:
+    chunker = SegmentChunker(max_duration=30, overlap=1)
+    chunked_video = chunker.chunk_video(video)   # same dict, 'timestamps' replaced by windows
+    """
+
+    def __init__(self, max_duration: Optional[float] = None, max_tokens: Optional[int] = None, overlap: int = 0):
+        """
+        Args:
+            max_duration (Optional[float]): Maximum window length in seconds (first start to last end).
+            max_tokens (Optional[int]): Maximum whitespace-separated words per window.
+            overlap (int): Timestamps repeated at the start of the next window. Default is 0.
+
+        Raises:
+            ValueError: If neither limit is set or overlap is negative.
+        """
+        if not max_duration and not max_tokens:
+            raise ValueError("Set max_duration and/or max_tokens.")
+        if overlap < 0:
+            raise ValueError("overlap must be >= 0.")
+        self.max_duration = max_duration
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+
+    def settings(self) -> Dict[str, Any]:
+        """Chunking parameters (part of the loader's settings, so changes trigger a reload)."""
+        return {'max_duration': self.max_duration, 'max_tokens': self.max_tokens, 'overlap': self.overlap}
+
+    def chunk(self, timestamps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Merge timestamps (in order) into windows.
+
+        A window always holds at least one timestamp, even one that alone exceeds a limit.
+
+        Returns:
+            List[Dict[str, Any]]: Windows with start_time, end_time, text, text_normalized,
+            seg_first, seg_last and seg_starts.
+        """
+        token_counts = [len((ts.get('text') or '').split()) for ts in timestamps]
+        windows = []
+        first = 0
+        while first < len(timestamps):
+            window_start = timestamps[first].get('start_time') or 0
+            tokens = 0
+            last = first
+            while last < len(timestamps):
+                if last > first:
+                    if self.max_tokens and tokens + token_counts[last] > self.max_tokens:
+                        break
+                    if self.max_duration and (timestamps[last].get('end_time') or 0) - window_start > self.max_duration:
+                        break
+                tokens += token_counts[last]
+                last += 1
+            windows.append(self._window(timestamps, first, last))
+            if last >= len(timestamps):
+                break
+            first = max(last - self.overlap, first + 1)  # Always advance, even with a large overlap
+        return windows
+
+    def chunk_video(self, video: Dict[str, Any]) -> Dict[str, Any]:
+        """Shallow copy of a video dict with its timestamps replaced by windows."""
+        timestamps = video.get('timestamps')
+        if not timestamps:
+            return video
+        return {**video, 'timestamps': self.chunk(timestamps)}
+
+    @staticmethod
+    def _window(timestamps: List[Dict[str, Any]], first: int, last: int) -> Dict[str, Any]:
+        """Merge timestamps[first:last] into one window."""
+        parts = timestamps[first:last]
+        texts = [ts.get('text') or '' for ts in parts]
+        return {
+            'start_time': parts[0].get('start_time', 0),
+            'end_time': parts[-1].get('end_time', 0),
+            'text': ' '.join(text for text in texts if text),
+            # Normalization is per fragment (cached), then joined; same result as normalizing the window
+            'text_normalized': ' '.join(
+                normalized for normalized in (
+                    ts.get('text_normalized') or normalize_arabic(text) for ts, text in zip(parts, texts)
+                ) if normalized
+            ),
+            'seg_first': first,
+            'seg_last': last - 1,
+            'seg_starts': [ts.get('start_time', 0) for ts in parts]
+        }
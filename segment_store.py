@@ -0,0 +1,192 @@
+"""
+Compact in-memory store for a loaded transcript export: one slotted record per video,
+segment times in array('d') columns and all texts in a single string with offsets.
+"""
+
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List
+
+VIDEO_FIELDS = ('youtuber_id', 'video_title', 'video_url', 'video_id', 'publish_date', 'duration')
+TIMESTAMP_FIELDS = frozenset(('start_time', 'end_time', 'text', 'text_normalized'))
+_MISSING = object()  # A video field absent from the export (distinct from an explicit null)
+START_INT, END_INT, START_MISSING, END_MISSING = 1, 2, 4, 8  # SegmentStore.time_flags bits
+
+
+class VideoRecord:
+    """Video-level fields of one video plus its segment row range [first, last)."""
+
+    __slots__ = VIDEO_FIELDS + ('extra', 'first', 'last', 'normalized')
+
+    def __init__(self, video: Dict[str, Any], first: int, last: int, normalized: bool):
+        for field in VIDEO_FIELDS:
+            setattr(self, field, video.get(field, _MISSING))
+        extra = {key: value for key, value in video.items() if key not in VIDEO_FIELDS and key != 'timestamps'}
+        self.extra = extra or None  # Uncommon fields (e.g. 'content'), only when present
+        self.first = first
+        self.last = last
+        self.normalized = normalized  # Whether every timestamp had text_normalized
+
+    def fields(self) -> Dict[str, Any]:
+        """Video-level fields as a dict, in the export's key order (missing fields omitted)."""
+        fields = {field: getattr(self, field) for field in VIDEO_FIELDS if getattr(self, field) is not _MISSING}
+        if self.extra:
+            fields.update(self.extra)
+        return fields
+
+
+class SegmentStore(Sequence):
+    """
+    A sequence of video dicts stored compactly: about 34 bytes per segment plus its
+    characters (text_normalized only where it differs from text), instead of a dict and
+    a string object per field per timestamp.
+
+    Indexing or iterating builds the video's dict (with its 'timestamps' list) on demand,
+    so consumers such as the loader's payload builder see the same shape as the parsed
+    JSON while only one video at a time is expanded.
+
+    Usage:
+    store = SegmentStore.from_videos(iter_videos('transcripts.json'))
+    for video in store: ...
+    store.start_times[store.videos[0].first]
+    """
+
+    def __init__(self):
+        self.videos: List[VideoRecord] = []
+        self.start_times = array('d')
+        self.end_times = array('d')
+        self.time_flags = bytearray()  # Per row: START_INT/END_INT (int in the export), START_MISSING/END_MISSING
+        self.text_offsets = array('q', [0])  # Segment row i's text is text[text_offsets[i]:text_offsets[i + 1]]
+        self.norm_offsets = array('q', [0])
+        self.norm_is_text = bytearray()  # 1 where text_normalized equals text (not stored again)
+        self.text = ''
+        self.text_normalized = ''
+        self._extras: Dict[int, Dict[str, Any]] = {}  # Segment row -> uncommon timestamp fields
+        self._text_parts: List[str] = []  # Per-video texts, joined by freeze()
+        self._norm_parts: List[str] = []
+
+    @classmethod
+    def from_videos(cls, videos: Iterable[Dict[str, Any]]) -> 'SegmentStore':
+        """Build a store from video dicts (e.g. streamed from a file, so the dicts never pile up)."""
+        store = cls()
+        for video in videos:
+            store.add_video(video)
+        store.freeze()
+        return store
+
+    def add_video(self, video: Dict[str, Any]) -> None:
+        """Append one video dict; call freeze() after the last one."""
+        timestamps = video.get('timestamps') or []
+        first = len(self.start_times)
+        normalized = all(ts.get('text_normalized') is not None for ts in timestamps)
+        text_end, norm_end = self.text_offsets[-1], self.norm_offsets[-1]
+        texts, norms = [], []
+        for row, ts in enumerate(timestamps, start=first):
+            text = ts.get('text') or ''
+            start, end = ts.get('start_time'), ts.get('end_time')
+            self.start_times.append(parse_time(start, video, row - first, 'start_time'))
+            self.end_times.append(parse_time(end, video, row - first, 'end_time'))
+            self.time_flags.append(time_flags(ts))
+            texts.append(text)
+            text_end += len(text)
+            self.text_offsets.append(text_end)
+            same = normalized and ts['text_normalized'] == text
+            if normalized and not same:
+                norms.append(ts['text_normalized'])
+                norm_end += len(ts['text_normalized'])
+            self.norm_offsets.append(norm_end)
+            self.norm_is_text.append(same)
+            extra = timestamp_extras(ts)
+            if extra:
+                self._extras[row] = extra
+        self._text_parts.append(''.join(texts))
+        self._norm_parts.append(''.join(norms))
+        self.videos.append(VideoRecord(video, first, len(self.start_times), normalized))
+
+    def freeze(self) -> None:
+        """Join the pending texts into the single text strings."""
+        if self._text_parts:
+            self.text += ''.join(self._text_parts)
+            self.text_normalized += ''.join(self._norm_parts)
+            self._text_parts, self._norm_parts = [], []
+
+    def __len__(self) -> int:
+        return len(self.videos)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        record = self.videos[index]
+        return {**record.fields(), 'timestamps': self.timestamps(record)}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for record in self.videos:
+            yield {**record.fields(), 'timestamps': self.timestamps(record)}
+
+    def timestamps(self, record: VideoRecord) -> List[Dict[str, Any]]:
+        """Timestamp dicts of one video."""
+        self.freeze()
+        text, norm = self.text, self.text_normalized
+        text_offsets, norm_offsets, norm_is_text = self.text_offsets, self.norm_offsets, self.norm_is_text
+        timestamps = []
+        for row in range(record.first, record.last):
+            segment_text = text[text_offsets[row]:text_offsets[row + 1]]
+            flags = self.time_flags[row]
+            ts = {}
+            if not flags & START_MISSING:
+                ts['start_time'] = int(self.start_times[row]) if flags & START_INT else self.start_times[row]
+            if not flags & END_MISSING:
+                ts['end_time'] = int(self.end_times[row]) if flags & END_INT else self.end_times[row]
+            ts['text'] = segment_text
+            if record.normalized:
+                ts['text_normalized'] = segment_text if norm_is_text[row] else norm[norm_offsets[row]:norm_offsets[row + 1]]
+            extra = self._extras.get(row)
+            if extra:
+                ts.update(extra)
+            timestamps.append(ts)
+        return timestamps
+
+
+def parse_time(value: Any, video: Dict[str, Any], ts_idx: int, field: str) -> float:
+    """
+    A timestamp's start_time/end_time as float seconds (missing or empty: 0).
+
+    Raises:
+        ValueError: If the value isn't a number or numeric string, naming the video and segment.
+    """
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(
+            f"Video {video.get('video_id', '')!r} timestamp {ts_idx}: {field} {value!r} is not a number of seconds."
+        ) from None
+
+
+def time_flags(ts: Dict[str, Any]) -> int:
+    """START_INT/END_INT/START_MISSING/END_MISSING bits of a timestamp, so its times read back as they were."""
+    start, end = ts.get('start_time'), ts.get('end_time')
+    return (
+        _is_int(start) * START_INT | _is_int(end) * END_INT
+        | ('start_time' not in ts) * START_MISSING | ('end_time' not in ts) * END_MISSING
+    )
+
+
+def timestamp_extras(ts: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a timestamp the columns can't hold: uncommon keys, and times given as strings or null."""
+    if ts.keys() <= TIMESTAMP_FIELDS and _is_number(ts.get('start_time', 0)) and _is_number(ts.get('end_time', 0)):
+        return {}
+    return {
+        key: value for key, value in ts.items()
+        if key not in TIMESTAMP_FIELDS or (key in ('start_time', 'end_time') and not _is_number(value))
+    }
+
+
+def _is_number(value: Any) -> bool:
+    """Whether a time reads back unchanged from the float column (with its START_INT/END_INT flag)."""
+    return isinstance(value, float) or _is_int(value)
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and abs(value) <= 1 << 53
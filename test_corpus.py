@@ -0,0 +1,20 @@
+import json
+
+from corpus import Corpus, verify_corpus, write_corpus
+from test_segment_store import VIDEOS
+
+
+def test_round_trip_keeps_time_types_and_extra_keys(tmp_path):
+    path = tmp_path / 'videos.corpus'
+    assert write_corpus(VIDEOS, path) == len(VIDEOS)
+    corpus = Corpus(path)
+    assert list(corpus) == VIDEOS
+    assert type(corpus[0]['timestamps'][1]['start_time']) is float  # 1.0 stays 1.0
+    assert corpus[1]['timestamps'][3]['speaker'] == 'extra key'
+
+
+def test_verify_float_times_export(tmp_path):
+    source = tmp_path / 'videos.json'
+    source.write_text(json.dumps(VIDEOS), encoding='utf-8')
+    write_corpus(VIDEOS, tmp_path / 'videos.corpus')
+    assert verify_corpus(str(source), str(tmp_path / 'videos.corpus')) == []
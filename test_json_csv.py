@@ -0,0 +1,37 @@
+import io
+import json
+import os
+
+import pytest
+
+from json_csv import JSONToCSVConverter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_mixed_int_float_times_match_pandas_fixture(tmp_path, stream):
+    converter = JSONToCSVConverter(os.path.join(FIXTURES, 'mixed_times.json'))
+    if not stream:
+        converter.read()
+    output = tmp_path / 'out.csv'
+    assert converter.write(str(output), stream=stream) == 5
+    with open(os.path.join(FIXTURES, 'mixed_times.csv'), 'rb') as f:
+        assert output.read_bytes() == f.read()
+
+
+def test_matches_pandas_when_columns_are_not_numeric(tmp_path):
+    pd = pytest.importorskip('pandas')
+    with open(os.path.join(FIXTURES, 'mixed_times.json'), encoding='utf-8') as f:
+        videos = json.load(f)
+    videos.append({'video_id': 'c', 'timestamps': []})  # Empty fields make every time column non-numeric
+    converter = JSONToCSVConverter('')
+    converter.data = videos
+    output = tmp_path / 'out.csv'
+    converter.write(str(output))
+    expected = io.StringIO()
+    pd.DataFrame(
+        [dict(zip(('youtuber_id', 'video_title', 'video_url', 'video_id', 'publish_date', 'duration',
+                   'start_time', 'end_time', 'text'), row)) for row in converter._iter_rows(videos)]
+    ).to_csv(expected, index=False)
+    assert output.read_text(encoding='utf-8') == expected.getvalue()
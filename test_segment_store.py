@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from load_manifest import LoadManifest
+from segment_store import SegmentStore
+
+VIDEOS = [
+    {
+        'youtuber_id': 'y1', 'video_title': 'Float times', 'video_url': 'https://youtube.com/watch?v=a',
+        'video_id': 'a', 'publish_date': '2024-01-15', 'duration': '1:30',
+        'timestamps': [
+            {'start_time': 0.0, 'end_time': 1.0, 'text': 'first'},  # As parse_time_to_seconds writes them
+            {'start_time': 1.0, 'end_time': 2.5, 'text': 'second'},
+            {'start_time': 2.5, 'end_time': 4.0, 'text': 'third'}
+        ]
+    },
+    {
+        'youtuber_id': 'y1', 'video_title': 'Mixed times', 'video_id': 'b',
+        'timestamps': [
+            {'start_time': 0, 'end_time': 45, 'text': 'int', 'text_normalized': 'int'},
+            {'start_time': 45, 'end_time': 90.0, 'text': 'mixed', 'text_normalized': 'mixed'},
+            {'start_time': '90', 'end_time': None, 'text': 'string and null', 'text_normalized': 'x'},
+            {'text': 'no times', 'text_normalized': 'no times', 'speaker': 'extra key'}
+        ]
+    }
+]
+
+
+def test_round_trip_keeps_time_types():
+    store = SegmentStore.from_videos(json.loads(json.dumps(VIDEOS)))
+    assert list(store) == VIDEOS
+    for original, restored in zip(VIDEOS, store):
+        for ts, restored_ts in zip(original['timestamps'], restored['timestamps']):
+            for field in ('start_time', 'end_time'):
+                assert type(restored_ts.get(field)) is type(ts.get(field))
+
+
+def test_round_trip_keeps_manifest_hashes():
+    store = SegmentStore.from_videos(VIDEOS)
+    assert [LoadManifest.video_hash(video) for video in store] == [LoadManifest.video_hash(video) for video in VIDEOS]
+
+
+def test_bad_time_names_video_and_segment():
+    video = {'video_id': 'bad', 'timestamps': [{'start_time': 0, 'end_time': 1}, {'start_time': '1:xx', 'end_time': 2}]}
+    with pytest.raises(ValueError, match=r"'bad' timestamp 1: start_time"):
+        SegmentStore.from_videos([video])
@@ -0,0 +1,24 @@
+import json
+
+from test_segment_store import VIDEOS
+from validate_export import ERRORS, validate_file
+
+
+def test_times_the_loaders_accept_are_warnings(tmp_path):
+    path = tmp_path / 'videos.json'
+    path.write_text(json.dumps(VIDEOS), encoding='utf-8')
+    report = validate_file(str(path))
+    assert report['ok']
+    assert report['issues']['coerced_time'] == 4  # '90', None and the two missing times
+    assert not ERRORS & set(report['issues'])
+
+
+def test_times_the_loaders_reject_are_errors(tmp_path):
+    path = tmp_path / 'videos.jsonl'
+    path.write_text(json.dumps({'video_id': 'bad', 'timestamps': [{'start_time': '12.5', 'end_time': '1:xx'}]}), encoding='utf-8')
+    report = validate_file(str(path))
+    assert not report['ok']
+    assert report['issues'] == {'coerced_time': 1, 'non_numeric_time': 1, 'missing_youtuber_id': 1,
+                                'missing_video_title': 1, 'missing_video_url': 1, 'missing_publish_date': 1,
+                                'empty_text': 1}
+    assert report['examples']['non_numeric_time'] == ["video #0 (bad) timestamp 0: end_time is '1:xx'"]
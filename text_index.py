@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Inverted index for exact, phrase and proximity search over transcript JSON
+(the format written by convert_csv_to_json.py).
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from arabic_normalize import normalize_arabic
+from corpus import iter_videos
+
+_TOKEN = re.compile(r'[^\W_]+')
+
+
+def tokenize(text: str, stem: bool = False) -> List[str]:
+    """Split Arabic-normalized (optionally light-stemmed) text into word tokens."""
+    return _TOKEN.findall(normalize_arabic(text, stem))
+
+
+class InvertedIndexBuilder:
+    """
+    Builds an on-disk inverted index, one video at a time.
+
+    Each video is one token stream (its segments back to back), so phrases can span
+    segment boundaries; segment start positions map a hit back to its ts_idx.
+
+    Files written to the index directory:
+        meta.json       - video table and per-video offsets into the segment arrays
+        vocab.json      - term -> [offset, doc_freq, positions] into postings.u32
+        postings.u32    - per term: doc-id deltas, per-doc position counts, position deltas
+        seg_tokens.u32  - token position where each segment starts
+        seg_times.f64   - start_time of each segment
+
+    Tokens are Arabic-normalized; with stem=True they are also light-stemmed, and the
+    setting is stored in meta.json so queries are tokenized the same way.
+
+    Usage:
+    builder = InvertedIndexBuilder()
+    for video in videos:
+        builder.add_video(video)
+    builder.write('transcripts_index')
+    """
+
+    def __init__(self, stem: bool = False):
+        self.stem = stem
+        self.videos: List[Dict[str, Any]] = []
+        self.video_seg_offsets = [0]
+        self.seg_tokens = array('I')
+        self.seg_times = array('d')
+        self._docs: Dict[str, array] = {}
+        self._counts: Dict[str, array] = {}
+        self._positions: Dict[str, array] = {}
+
+    def add_video(self, video: Dict[str, Any]) -> None:
+        """Index all timestamp texts of one video dict."""
+        doc_id = len(self.videos)
+        self.videos.append({
+            'video_id': video.get('video_id', ''),
+            'youtuber_id': video.get('youtuber_id', ''),
+            'video_title': video.get('video_title', '')
+        })
+
+        term_positions: Dict[str, List[int]] = {}
+        position = 0
+        for ts in video.get('timestamps', []):
+            self.seg_tokens.append(position)
+            self.seg_times.append(float(ts.get('start_time') or 0))
+            for token in tokenize(ts.get('text', ''), self.stem):
+                term_positions.setdefault(token, []).append(position)
+                position += 1
+        self.video_seg_offsets.append(len(self.seg_tokens))
+
+        for term, positions in term_positions.items():
+            if term not in self._docs:
+                self._docs[term] = array('I')
+                self._counts[term] = array('I')
+                self._positions[term] = array('I')
+            self._docs[term].append(doc_id)
+            self._counts[term].append(len(positions))
+            self._positions[term].extend(b - a for a, b in zip([0] + positions, positions))
+
+    def write(self, index_dir: str) -> None:
+        """Write the index files (delta-encoded uint32 postings) to index_dir."""
+        os.makedirs(index_dir, exist_ok=True)
+        vocab = {}
+        offset = 0
+        with open(os.path.join(index_dir, 'postings.u32'), 'wb') as f:
+            for term in sorted(self._docs):
+                docs = self._docs[term]
+                deltas = array('I', (b - a for a, b in zip([0] + docs.tolist(), docs)))
+                for block in (deltas, self._counts[term], self._positions[term]):
+                    block.tofile(f)
+                vocab[term] = [offset, len(docs), len(self._positions[term])]
+                offset += 2 * len(docs) + len(self._positions[term])
+
+        with open(os.path.join(index_dir, 'seg_tokens.u32'), 'wb') as f:
+            self.seg_tokens.tofile(f)
+        with open(os.path.join(index_dir, 'seg_times.f64'), 'wb') as f:
+            self.seg_times.tofile(f)
+        with open(os.path.join(index_dir, 'vocab.json'), 'w', encoding='utf-8') as f:
+            json.dump(vocab, f, ensure_ascii=False, separators=(',', ':'))
+        with open(os.path.join(index_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(
+                {'stem': self.stem, 'videos': self.videos, 'video_seg_offsets': self.video_seg_offsets},
+                f, ensure_ascii=False
+            )
+
+
+class InvertedIndex:
+    """
+    Read side of an index written by InvertedIndexBuilder.
+
+    Posting arrays are memory-mapped and decoded per query term (a prefix sum over the
+    deltas), so lookups touch only the terms in the query.
+
+    Usage:
+    index = InvertedIndex('transcripts_index')
+    index.search('ابن رشد', mode='phrase')
+    index.search('الفلسفة أوروبا', mode='near', window=10)
+    """
+
+    def __init__(self, index_dir: str):
+        with open(os.path.join(index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(index_dir, 'vocab.json'), 'r', encoding='utf-8') as f:
+            self.vocab: Dict[str, List[int]] = json.load(f)
+        self.stem = meta.get('stem', False)
+        self.videos = meta['videos']
+        self.video_seg_offsets = meta['video_seg_offsets']
+        self._postings = self._map(os.path.join(index_dir, 'postings.u32'), 'I')
+        self._seg_tokens = self._map(os.path.join(index_dir, 'seg_tokens.u32'), 'I')
+        self._seg_times = self._map(os.path.join(index_dir, 'seg_times.f64'), 'd')
+
+    @staticmethod
+    def _map(file_path: str, typecode: str) -> memoryview:
+        """Zero-copy typed view of a binary array file."""
+        if not os.path.getsize(file_path):
+            return memoryview(array(typecode))
+        with open(file_path, 'rb') as f:
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(typecode)
+
+    def postings(self, term: str) -> Dict[int, List[int]]:
+        """Video row -> token positions for one (already tokenized) term."""
+        entry = self.vocab.get(term)
+        if entry is None:
+            return {}
+        offset, doc_freq, n_positions = entry
+        docs = accumulate(self._postings[offset:offset + doc_freq])
+        counts = self._postings[offset + doc_freq:offset + 2 * doc_freq]
+        deltas = self._postings[offset + 2 * doc_freq:offset + 2 * doc_freq + n_positions]
+        result = {}
+        start = 0
+        for doc, count in zip(docs, counts):
+            result[doc] = list(accumulate(deltas[start:start + count]))
+            start += count
+        return result
+
+    def search(self, query: str, mode: str = 'phrase', window: int = 5, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Find query matches.
+
+        Args:
+            query (str): Query text; tokenized like the indexed transcripts.
+            mode (str): 'phrase' for the exact token sequence, 'near' for all tokens within
+                `window` positions of the rarest one (any order). Default is 'phrase'.
+            window (int): Proximity window for mode='near'. Default is 5.
+            limit (Optional[int]): Maximum hits to return (None = all).
+
+        Returns:
+            List[Dict]: Hits as {'video_id', 'youtuber_id', 'ts_idx', 'start_time', 'position'},
+            in video order.
+        """
+        if mode not in ('phrase', 'near'):
+            raise ValueError("mode must be 'phrase' or 'near'.")
+        terms = tokenize(query, self.stem)
+        if not terms:
+            return []
+
+        postings = [self.postings(term) for term in terms]
+        docs = set(postings[0])
+        for term_postings in postings[1:]:
+            docs &= term_postings.keys()
+
+        hits = []
+        for doc in sorted(docs):
+            if mode == 'phrase':
+                matches = self._phrase_matches([term_postings[doc] for term_postings in postings])
+            else:
+                matches = self._near_matches([term_postings[doc] for term_postings in postings], window)
+            for position in matches:
+                hits.append(self._hit(doc, position))
+                if limit is not None and len(hits) >= limit:
+                    return hits
+        return hits
+
+    @staticmethod
+    def _phrase_matches(positions: List[List[int]]) -> Iterator[int]:
+        """Start positions where term i occurs at start + i for every term."""
+        later = [set(term_positions) for term_positions in positions[1:]]
+        for start in positions[0]:
+            if all(start + i in term_positions for i, term_positions in enumerate(later, start=1)):
+                yield start
+
+    @staticmethod
+    def _near_matches(positions: List[List[int]], window: int) -> Iterator[int]:
+        """Positions of the rarest term that have every other term within `window` tokens."""
+        anchor = min(range(len(positions)), key=lambda i: len(positions[i]))
+        for position in positions[anchor]:
+            if all(
+                bisect_left(term_positions, position - window) < bisect_right(term_positions, position + window)
+                for term_positions in positions
+            ):
+                yield position
+
+    def _hit(self, doc: int, position: int) -> Dict[str, Any]:
+        """Map a (video row, token position) match to its video and segment."""
+        first, last = self.video_seg_offsets[doc], self.video_seg_offsets[doc + 1]
+        seg = bisect_right(self._seg_tokens, position, first, last) - 1
+        return {
+            'video_id': self.videos[doc]['video_id'],
+            'youtuber_id': self.videos[doc]['youtuber_id'],
+            'ts_idx': seg - first,
+            'start_time': self._seg_times[seg],
+            'position': position
+        }
+
+
+def build_index(input_file: str, index_dir: str, stem: bool = False) -> InvertedIndexBuilder:
+    """Stream a transcript JSON file into an inverted index at index_dir."""
+    started = time.perf_counter()
+    builder = InvertedIndexBuilder(stem=stem)
+    for video in iter_videos(input_file):
+        builder.add_video(video)
+    builder.write(index_dir)
+    print(f"✅ Indexed {len(builder.videos)} videos, {len(builder.seg_tokens)} segments, "
+          f"{len(builder._docs)} terms into {index_dir} in {time.perf_counter() - started:.1f}s")
+    return builder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a transcript inverted index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Index a transcript JSON file")
+    build.add_argument('input_file')
+    build.add_argument('index_dir')
+    build.add_argument('--stem', action='store_true', help="Light-stem Arabic tokens (broader matches)")
+    search = subparsers.add_parser('search', help="Phrase or proximity search")
+    search.add_argument('index_dir')
+    search.add_argument('query')
+    search.add_argument('--near', type=int, metavar='WINDOW', help="Proximity search within WINDOW tokens")
+    search.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_index(args.input_file, args.index_dir, stem=args.stem)
+        return
+
+    index = InvertedIndex(args.index_dir)
+    started = time.perf_counter()
+    if args.near is not None:
+        hits = index.search(args.query, mode='near', window=args.near, limit=args.limit)
+    else:
+        hits = index.search(args.query, mode='phrase', limit=args.limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for hit in hits:
+        print(f"{hit['video_id']} #{hit['ts_idx']} @ {hit['start_time']:.0f}s")
+    print(f"{len(hits)} hits in {elapsed_ms:.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Single-pass validator and profiler for transcript exports (JSON array, JSON Lines,
+either optionally gzipped, or a '.corpus' directory).
+
+Checks the shape JSONToQdrantLoader expects while streaming the file once and prints
+corpus stats. Directories are searched for exports, which are validated in parallel
+(one process per file).
+
+    python validate_export.py transcripts.json
+    python validate_export.py ready_to_upload/ --workers 8
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from numbers import Real
+from typing import Any, Dict, List, Optional, Tuple
+
+from corpus import is_corpus, iter_videos
+from segment_store import parse_time
+
+EXPORT_SUFFIXES = ('.json', '.jsonl', '.json.gz', '.jsonl.gz')
+REQUIRED_VIDEO_KEYS = ('video_id', 'timestamps')
+EXPECTED_VIDEO_KEYS = ('youtuber_id', 'video_title', 'video_url', 'publish_date')
+
+# Issue kinds that make a file fail; everything else is reported as a warning
+ERRORS = {
+    'not_an_object', 'missing_video_id', 'timestamps_not_a_list', 'timestamp_not_an_object',
+    'non_numeric_time', 'duplicate_video_id'
+}
+
+
+class ExportValidator:
+    """
+    Streams one export and collects issue counts (with the first few examples) and stats.
+
+    Issues per video: missing video_id (error) or expected metadata keys (warning),
+    timestamps that are not a list (error), duplicate video_ids (error). Per timestamp:
+    start_time/end_time the loaders can't read as seconds (error), times they convert on
+    the way in - numeric strings, null or missing, read as 0 (warning, like segment_store.parse_time),
+    end before start, start_time going backwards and empty text (warnings).
+
+    Usage:
+    report = ExportValidator('transcripts.json').validate()
+    print_report(report)
+    """
+
+    def __init__(self, file_path: str, max_examples: int = 5):
+        """
+        Args:
+            file_path (str): Export file or '.corpus' directory.
+            max_examples (int): Example messages kept per issue kind. Default is 5.
+        """
+        self.file_path = file_path
+        self.max_examples = max_examples
+        self.issues: Counter = Counter()
+        self.examples: Dict[str, List[str]] = {}
+
+    def _issue(self, kind: str, message: str) -> None:
+        self.issues[kind] += 1
+        examples = self.examples.setdefault(kind, [])
+        if len(examples) < self.max_examples:
+            examples.append(message)
+
+    def validate(self) -> Dict[str, Any]:
+        """
+        Validate the file in one pass.
+
+        Returns:
+            Dict[str, Any]: Report with 'file', 'ok', 'fatal' (parse/read error or None), 'bom',
+            'size_bytes', 'videos', 'segments', 'text_bytes', 'empty_texts', 'issues'
+            (kind -> count), 'examples' (kind -> messages) and 'seconds'.
+        """
+        started = time.perf_counter()
+        report: Dict[str, Any] = {
+            'file': self.file_path, 'ok': False, 'fatal': None, 'bom': False, 'size_bytes': _size(self.file_path),
+            'videos': 0, 'segments': 0, 'text_bytes': 0, 'empty_texts': 0
+        }
+        seen_ids = set()
+        try:
+            report['bom'] = _has_bom(self.file_path)
+            for video_idx, video in enumerate(iter_videos(self.file_path)):
+                report['videos'] += 1
+                self._check_video(video_idx, video, seen_ids, report)
+        except (ValueError, UnicodeDecodeError, OSError) as e:
+            report['fatal'] = f"{type(e).__name__} after {report['videos']} videos: {e}"
+        report['issues'] = dict(self.issues)
+        report['examples'] = self.examples
+        report['ok'] = report['fatal'] is None and not any(kind in ERRORS for kind in self.issues)
+        report['seconds'] = time.perf_counter() - started
+        return report
+
+    def _check_video(self, video_idx: int, video: Any, seen_ids: set, report: Dict[str, Any]) -> None:
+        where = f"video #{video_idx}"
+        if not isinstance(video, dict):
+            self._issue('not_an_object', f"{where} is a {type(video).__name__}")
+            return
+        video_id = video.get('video_id')
+        if video_id:
+            where = f"video #{video_idx} ({video_id})"
+            if video_id in seen_ids:
+                self._issue('duplicate_video_id', f"{where} repeats an earlier video_id")
+            seen_ids.add(video_id)
+        else:
+            self._issue('missing_video_id', f"{where} has no video_id")
+        for key in EXPECTED_VIDEO_KEYS:
+            if not video.get(key):
+                self._issue(f'missing_{key}', f"{where} has no {key}")
+
+        timestamps = video.get('timestamps')
+        if not isinstance(timestamps, list):
+            if 'timestamps' in video:
+                self._issue('timestamps_not_a_list', f"{where}: timestamps is a {type(timestamps).__name__}")
+            else:
+                self._issue('missing_timestamps', f"{where} has no timestamps")
+            return
+        if not timestamps:
+            self._issue('no_timestamps', f"{where} has an empty timestamps list")
+        report['segments'] += len(timestamps)
+
+        previous_start = None
+        for ts_idx, ts in enumerate(timestamps):
+            if not isinstance(ts, dict):
+                self._issue('timestamp_not_an_object', f"{where} timestamp {ts_idx} is a {type(ts).__name__}")
+                continue
+            times = []
+            for name in ('start_time', 'end_time'):
+                value = ts.get(name)
+                try:
+                    times.append(parse_time(value, video, ts_idx, name))
+                except ValueError:
+                    self._issue('non_numeric_time', f"{where} timestamp {ts_idx}: {name} is {value!r}")
+                    continue
+                if not isinstance(value, Real) or isinstance(value, bool):
+                    self._issue('coerced_time', f"{where} timestamp {ts_idx}: {name} is {value!r}, loaded as {times[-1]}")
+            if len(times) == 2:
+                start, end = times
+                if end < start:
+                    self._issue('end_before_start', f"{where} timestamp {ts_idx}: end_time {end} < start_time {start}")
+                if previous_start is not None and start < previous_start:
+                    self._issue('start_time_decreases', f"{where} timestamp {ts_idx}: start_time {start} < {previous_start}")
+                previous_start = start
+            text = ts.get('text')
+            if not text or not str(text).strip():
+                report['empty_texts'] += 1
+                self._issue('empty_text', f"{where} timestamp {ts_idx} has no text")
+            else:
+                report['text_bytes'] += len(str(text).encode('utf-8'))
+
+
+def _size(file_path: str) -> Optional[int]:
+    try:
+        if os.path.isdir(file_path):
+            return sum(entry.stat().st_size for entry in os.scandir(file_path) if entry.is_file())
+        return os.path.getsize(file_path)
+    except OSError:
+        return None
+
+
+def _has_bom(file_path: str) -> bool:
+    """Whether the (decompressed) file starts with a UTF-8 BOM; the readers strip it, other tools may not."""
+    if is_corpus(file_path):
+        return False
+    opener = gzip.open if str(file_path).endswith('.gz') else open
+    with opener(file_path, 'rb') as f:
+        return f.read(3) == b'\xef\xbb\xbf'
+
+
+def validate_file(file_path: str, max_examples: int = 5) -> Dict[str, Any]:
+    """Validate one export (see ExportValidator.validate)."""
+    return ExportValidator(file_path, max_examples).validate()
+
+
+def find_exports(path: str) -> List[str]:
+    """The export itself, or every export (and '.corpus' directory) under a directory, sorted."""
+    if not os.path.isdir(path) or is_corpus(path):
+        return [path]
+    found = []
+    for root, dirs, files in os.walk(path):
+        for name in list(dirs):
+            if is_corpus(name):
+                found.append(os.path.join(root, name))
+                dirs.remove(name)  # Don't descend into the corpus files
+        found.extend(os.path.join(root, name) for name in files if name.endswith(EXPORT_SUFFIXES))
+    return sorted(found)
+
+
+def validate_paths(paths: List[str], workers: Optional[int] = None, max_examples: int = 5) -> List[Dict[str, Any]]:
+    """
+    Validate files and directories of exports, several files at once.
+
+    Args:
+        paths (List[str]): Export files, '.corpus' directories or directories to search.
+        workers (Optional[int]): Processes validating files in parallel. Default is os.cpu_count().
+        max_examples (int): Example messages kept per issue kind. Default is 5.
+
+    Returns:
+        List[Dict[str, Any]]: One report per file, in path order.
+    """
+    files = [file_path for path in paths for file_path in find_exports(path)]
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        return [validate_file(file_path, max_examples) for file_path in files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(validate_file, files, [max_examples] * len(files)))
+
+
+def test_json_file(file_path: str) -> Tuple[bool, str]:
+    """
+    Tests if a JSON export exists and is valid (kept for scripts that used test_json.py).
+    """
+    if not os.path.exists(file_path):
+        return False, f"Error: The file '{file_path}' does not exist."
+    report = validate_file(file_path)
+    if report['fatal']:
+        return False, f"Invalid JSON: {report['fatal']}"
+    if not report['ok']:
+        return False, "Invalid export: " + ', '.join(f"{kind} x{count}" for kind, count in report['issues'].items() if kind in ERRORS)
+    return True, "Success: File is valid JSON."
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    status = '✅' if report['ok'] else '❌'
+    size = report['size_bytes']
+    print(f"{status} {report['file']}" + (f" ({size:,} bytes)" if size is not None else ''))
+    if report['fatal']:
+        print(f"   Fatal: {report['fatal']}")
+    print(f"   {report['videos']:,} videos, {report['segments']:,} segments, {report['text_bytes']:,} text bytes, "
+          f"{report['empty_texts']:,} empty texts ({report['seconds']:.2f}s)")
+    if report['bom']:
+        print("   ⚠️  Starts with a UTF-8 BOM")
+    for kind, count in sorted(report['issues'].items(), key=lambda item: (item[0] not in ERRORS, item[0])):
+        print(f"   {'❌' if kind in ERRORS else '⚠️ '} {kind}: {count:,}")
+        for example in report['examples'].get(kind, []):
+            print(f"      - {example}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and profile transcript exports in one streaming pass")
+    parser.add_argument('paths', nargs='+', help="Export files (.json, .jsonl, .gz), .corpus directories or directories to search")
+    parser.add_argument('--workers', type=int, help="Files validated in parallel (default: CPU count)")
+    parser.add_argument('--max-examples', type=int, default=5, help="Example messages shown per issue kind")
+    parser.add_argument('--json', action='store_true', help="Print the reports as JSON")
+    args = parser.parse_args()
+
+    reports = validate_paths(args.paths, args.workers, args.max_examples)
+    if not reports:
+        print("No exports found.")
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        for report in reports:
+            print_report(report)
+        if len(reports) > 1:
+            print(f"\n{sum(report['ok'] for report in reports)}/{len(reports)} files valid: "
+                  f"{sum(report['videos'] for report in reports):,} videos, "
+                  f"{sum(report['segments'] for report in reports):,} segments, "
+                  f"{sum(report['text_bytes'] for report in reports):,} text bytes")
+    sys.exit(0 if all(report['ok'] for report in reports) else 1)
+
+
+if __name__ == "__main__":
+    main()